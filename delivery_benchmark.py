@@ -0,0 +1,91 @@
+'''
+Compares per-client emits sent through the Redis message queue (the old
+socketio.emit(room=sid) path) with src.delivery.deliver(), which writes
+straight to sids connected to this worker.
+
+For each path the report lists delivered messages per second and the bytes
+Redis received while the messages were sent, taken from INFO stats.
+
+Usage (needs a Redis server):
+    REDIS_URL=redis://localhost:6379 python delivery_benchmark.py --clients 50 --messages 200
+'''
+from gevent import monkey
+monkey.patch_all()
+
+import os
+import time
+import argparse
+import gevent
+import redis
+from flask import Flask
+from flask_socketio import SocketIO
+
+from src.delivery import deliver
+
+def _redis_input_bytes(client):
+    return client.info('stats')['total_net_input_bytes']
+
+def _run(label, send, socketio, test_clients, messages, payload, redis_client):
+    for test_client in test_clients:
+        test_client.get_received()
+    sids = [socketio.server.manager.sid_from_eio_sid(test_client.eio_sid, '/') for test_client in test_clients]
+
+    redis_before = _redis_input_bytes(redis_client)
+    started = time.perf_counter()
+    for _ in range(messages):
+        for sid in sids:
+            send(socketio, 'final_result', payload, sid)
+        gevent.sleep(0)
+
+    # Queued emits arrive through the Redis listener greenlet; wait until every client has them all
+    expected = messages * len(test_clients)
+    received = 0
+    deadline = time.monotonic() + 60
+    while received < expected and time.monotonic() < deadline:
+        gevent.sleep(0.01)
+        received += sum(len(test_client.get_received()) for test_client in test_clients)
+    elapsed = time.perf_counter() - started
+    redis_bytes = _redis_input_bytes(redis_client) - redis_before
+
+    return {
+        'path': label,
+        'messages': received,
+        'seconds': elapsed,
+        'messages_per_second': received / elapsed if elapsed else 0,
+        'redis_bytes': redis_bytes,
+    }
+
+def queued_emit(socketio, event, payload, sid):
+    """The emit every handler used before local delivery."""
+    socketio.emit(event, payload, room=sid)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark queued versus local per-client delivery.")
+    parser.add_argument('--clients', type=int, default=50, help="Number of connected test clients.")
+    parser.add_argument('--messages', type=int, default=200, help="Messages sent to each client per path.")
+    parser.add_argument('--payload-bytes', type=int, default=200, help="Size of the text in each message.")
+    args = parser.parse_args()
+
+    redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
+    redis_client = redis.Redis.from_url(redis_url)
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='gevent', message_queue=redis_url)
+    test_clients = [socketio.test_client(app) for _ in range(args.clients)]
+    # Give the Redis listener greenlet time to subscribe
+    gevent.sleep(0.5)
+
+    payload = {'original': 'x' * args.payload_bytes, 'refined': 'y' * args.payload_bytes, 'source_lang': 'en-US', 'target_lang': 'zh-TW'}
+    results = [
+        _run('before: queued', queued_emit, socketio, test_clients, args.messages, payload, redis_client),
+        _run('after: deliver', deliver, socketio, test_clients, args.messages, payload, redis_client),
+    ]
+
+    print(f"{'path':<16}{'messages':>10}{'seconds':>10}{'msg/s':>12}{'redis bytes':>14}")
+    for result in results:
+        print(f"{result['path']:<16}{result['messages']:>10}{result['seconds']:>10.2f}{result['messages_per_second']:>12.0f}{result['redis_bytes']:>14}")
+
+    for test_client in test_clients:
+        test_client.disconnect()
+
+if __name__ == '__main__':
+    main()
@@ -1,37 +1,37 @@
 
-import os
-import google.generativeai as genai
 import logging
+from src.hub_safety import run_blocking
+from src.translation_service import get_model, language_label
 
 
-# 只建立 Gemini model，不再 configure（已於 app.py 全域 configure）
-try:
-    model = genai.GenerativeModel(model_name="gemini-2.5-flash-lite")
-except Exception as e:
-    logging.error(f"Failed to initialize Gemini model in interview_coach.py: {e}")
-    model = None
+def get_interview_instruction(language: str, LANGUAGE_NAMES: dict) -> str:
+    """Returns the interview coach system instruction for the given answer language."""
+    # Only supported languages reach the instruction, which keys the cached model
+    language = language_label(language, LANGUAGE_NAMES) or "逐字稿的語言"
+    return (
+        "你是一個專業的面試教練，請以資深面試官的角度，分析使用者提供的面試對話，並給出三個能立即幫助使用者加分的具體建議。"
+        f"請用 {language} 回答。 回答僅限5個句子之內"
+    )
 
-def get_interview_feedback(transcript: str, language: str) -> str:
+def get_interview_feedback(transcript: str, language: str, LANGUAGE_NAMES: dict) -> str:
     """
     Generates structured interview feedback using a specific persona.
 
     Args:
         transcript: The full text of the interview session.
-        language: The language of the transcript.
+        language: The language code or name of the transcript.
+        LANGUAGE_NAMES: The supported language codes and their names.
 
     Returns:
         A string containing structured feedback, or an error message.
     """
-    if not model:
-        return "Error: Interview Coach model is not configured."
     if not transcript or not transcript.strip():
         return "Nothing to analyze."
 
     try:
-        prompt = f"""
-你是一個專業的面試教練，請以資深面試官的角度，分析以下面試對話，並給出三個能立即幫助使用者加分的具體建議。\n\n面試對話內容：\n{transcript}\n\n請用 {language} 回答。 回答僅限5個句子之內
-"""
-        response = model.generate_content(prompt)
+        # The coaching persona is cached on the model; only the transcript is sent per request
+        model = get_model(get_interview_instruction(language, LANGUAGE_NAMES))
+        response = run_blocking(model.generate_content, transcript)
         feedback = response.text.strip()
         logging.info("Successfully generated interview feedback via dedicated module.")
         return feedback
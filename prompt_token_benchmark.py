@@ -0,0 +1,66 @@
+'''
+Compares per-request token counts of the old inline translation prompts
+with the compact system-instruction prompts in src/translation_service.py.
+
+Gemini counts system instruction tokens on every request, so the report
+lists content and instruction tokens separately alongside the total.
+
+Usage (needs GEMINI_API_KEY):
+    python prompt_token_benchmark.py
+'''
+import os
+import google.generativeai as genai
+from dotenv import load_dotenv
+
+from src.translation_service import MODEL_NAME, get_translation_instruction, get_translation_prompt
+
+LANGUAGE_NAMES = {"en-US": "English", "zh-TW": "Traditional Chinese", "ja-JP": "Japanese", "fr-FR": "French"}
+
+SAMPLE_UTTERANCES = [
+    "so um I think we should move the launch to next Thursday",
+    "can you hear me okay",
+    "the numbers from last quarter look better than we expected honestly",
+]
+
+def legacy_translation_prompt(text, target_lang_code):
+    """The inline prompt that was sent with every utterance before system instructions were cached."""
+    target_language_name = LANGUAGE_NAMES.get(target_lang_code, "the target language")
+    if target_lang_code == "zh-TW":
+        return (
+            f"You are an expert translator specializing in Taiwanese Mandarin (Traditional Chinese).\n"
+            f"Your task is to translate the following spoken input into natural, colloquial, and idiomatic "
+            f"Taiwanese Mandarin (Traditional Chinese).\n"
+            f"The input may be fragmented, contain pauses, or have ungrammatical phrasing due to real-time speech.\n"
+            f"Your goal is to produce a fluent and contextually accurate translation. Avoid using Simplified Chinese characters, "
+            f"Cantonese colloquialisms, or any overly formal language.\n\n"
+            f"Input speech: '{text}'\n\n"
+            f"Please provide ONLY the translated sentence in Traditional Chinese. Do not include any explanations, "
+            f"notes, or introductory phrases like 'Here is the translation:'.\n"
+            f"Translated sentence:"
+        )
+    return (
+        f"You are an expert in oral translation. Your task is to translate the user's input into natural, "
+        f"colloquial {target_language_name}. The user's input might be fragmented or ungrammatical because it's from real-time speech. "
+        f"Refine it and provide a fluent translation. "
+        f"Input: '{text}'\n"
+        f"Please return only the translated sentence, without any explanation or extra text."
+    )
+
+def main():
+    load_dotenv()
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    counter = genai.GenerativeModel(model_name=MODEL_NAME)
+
+    def count(text):
+        return counter.count_tokens(text).total_tokens
+
+    print(f"{'target':<8}{'legacy':>8}{'content':>9}{'instr.':>8}{'total':>8}{'saved':>8}")
+    for target_lang_code in LANGUAGE_NAMES:
+        instruction_tokens = count(get_translation_instruction(target_lang_code, LANGUAGE_NAMES))
+        legacy = sum(count(legacy_translation_prompt(text, target_lang_code)) for text in SAMPLE_UTTERANCES) / len(SAMPLE_UTTERANCES)
+        content = sum(count(get_translation_prompt(text, target_lang_code, LANGUAGE_NAMES)) for text in SAMPLE_UTTERANCES) / len(SAMPLE_UTTERANCES)
+        total = content + instruction_tokens
+        print(f"{target_lang_code:<8}{legacy:>8.1f}{content:>9.1f}{instruction_tokens:>8}{total:>8.1f}{legacy - total:>8.1f}")
+
+if __name__ == '__main__':
+    main()
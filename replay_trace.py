@@ -0,0 +1,331 @@
+'''
+Replays recorded session traces against the SocketIO handlers.
+
+Speech recognition, Gemini and TTS are replaced by simulated providers
+with fixed latencies, so runs are deterministic and need no API keys.
+Every trace becomes one simulated client; all clients are replayed
+concurrently, either at recorded speed or accelerated.
+
+Usage:
+    python replay_trace.py traces/*.trace --speed 10 --output report.json
+'''
+import sys
+import json
+import time
+import types
+import argparse
+import tracemalloc
+from collections import defaultdict
+
+import gevent
+import gevent.event
+import flask
+from flask import Flask
+
+from src.session_trace import read_trace
+from src import socket_handlers
+from src import client_manager
+
+# Audio is 16 kHz 16-bit mono PCM
+BYTES_PER_SECOND = 32000
+
+LANGUAGE_VOICES = {"en-US": "en-US-JennyNeural", "zh-TW": "zh-TW-HsiaoChenNeural", "ja-JP": "ja-JP-NanamiNeural", "fr-FR": "fr-FR-DeniseNeural"}
+LANGUAGE_NAMES = {"en-US": "English", "zh-TW": "Traditional Chinese", "ja-JP": "Japanese", "fr-FR": "French"}
+
+# --- Simulated Azure Speech SDK ---
+
+class _Signal:
+    def __init__(self):
+        self.callbacks = []
+
+    def connect(self, callback):
+        self.callbacks.append(callback)
+
+    def disconnect_all(self):
+        self.callbacks = []
+
+    def fire(self, evt):
+        for callback in list(self.callbacks):
+            callback(evt)
+
+class _Result:
+    def __init__(self, text, reason):
+        self.text = text
+        self.reason = reason
+        self.properties = {}
+        self.cancellation_details = None
+
+class _Event:
+    def __init__(self, result):
+        self.result = result
+
+# Recognition callbacks still running, joined before the report is built
+_callback_greenlets = []
+
+def _spawn_callback(fire, evt):
+    _callback_greenlets.append(gevent.spawn(fire, evt))
+
+class SimulatedRecognizer:
+    """Emits an interim result every half second of audio and a final result every utterance."""
+
+    def __init__(self, speech_config=None, audio_config=None, auto_detect_source_language_config=None, utterance_seconds=3.0):
+        self.recognizing = _Signal()
+        self.recognized = _Signal()
+        self.session_stopped = _Signal()
+        self.canceled = _Signal()
+        self.utterance_bytes = int(utterance_seconds * BYTES_PER_SECOND)
+        self.interim_bytes = BYTES_PER_SECOND // 2
+        self.buffered = 0
+        self.utterances = 0
+        self.running = False
+        if audio_config is not None:
+            audio_config.stream.recognizer = self
+
+    def start_continuous_recognition(self):
+        self.running = True
+
+    def stop_continuous_recognition(self):
+        if self.running:
+            self.running = False
+            self.session_stopped.fire(_Event(None))
+
+    def feed(self, nbytes):
+        # The real SDK fires callbacks on its own threads, not inside audio_data,
+        # so they run in separate greenlets and their latency stays out of the handler timings
+        if not self.running:
+            return
+        before = self.buffered
+        self.buffered += nbytes
+        if self.buffered // self.interim_bytes > before // self.interim_bytes:
+            _spawn_callback(self.recognizing.fire, _Event(_Result(f"utterance {self.utterances} ...", speechsdk.ResultReason.RecognizingSpeech)))
+        if self.buffered >= self.utterance_bytes:
+            self.buffered = 0
+            self.utterances += 1
+            _spawn_callback(self.recognized.fire, _Event(_Result(f"utterance {self.utterances}", speechsdk.ResultReason.RecognizedSpeech)))
+
+class SimulatedPushStream:
+    def __init__(self, stream_format=None):
+        self.recognizer = None
+        self.closed = False
+
+    def write(self, data):
+        if self.closed:
+            raise RuntimeError("Stream is closed.")
+        if self.recognizer:
+            self.recognizer.feed(len(data))
+
+    def close(self):
+        self.closed = True
+
+class SimulatedSpeechConfig:
+    def __init__(self, subscription=None, region=None):
+        self.speech_recognition_language = None
+
+    def set_property(self, property_id=None, value=None):
+        pass
+
+speechsdk = types.SimpleNamespace(
+    SpeechConfig=SimulatedSpeechConfig,
+    SpeechRecognizer=SimulatedRecognizer,
+    audio=types.SimpleNamespace(
+        PushAudioInputStream=SimulatedPushStream,
+        AudioConfig=lambda stream=None: types.SimpleNamespace(stream=stream),
+        AudioStreamFormat=lambda **kwargs: None,
+    ),
+    languageconfig=types.SimpleNamespace(AutoDetectSourceLanguageConfig=lambda languages=None: None),
+    ResultReason=types.SimpleNamespace(RecognizingSpeech='RecognizingSpeech', RecognizedSpeech='RecognizedSpeech', NoMatch='NoMatch', Canceled='Canceled'),
+    CancellationReason=types.SimpleNamespace(Error='Error'),
+    PropertyId=types.SimpleNamespace(SpeechServiceConnection_LanguageIdMode='LanguageIdMode', SpeechServiceConnection_AutoDetectSourceLanguageResult='AutoDetectResult'),
+)
+
+# --- Simulated Gemini and TTS ---
+
+class SimulatedModel:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        # Runs on the blocking threadpool, so a plain sleep stands in for the network call
+        time.sleep(self.latency)
+        self.calls += 1
+        return types.SimpleNamespace(text=f"translated({len(prompt)})")
+
+def simulated_synthesize_speech(latency, audio_bytes):
+    def synthesize_speech(text, lang_code, sid, socketio, speech_config, LANGUAGE_VOICES, event_name='audio_synthesis_result'):
+        gevent.sleep(latency)
+        audio_data = b'\0' * audio_bytes
+        if event_name == 'chat_audio_result':
+            return audio_data
+        socketio.emit(event_name, {'audio': audio_data}, room=sid)
+        return None
+    return synthesize_speech
+
+# --- Simulated Flask-SocketIO server ---
+
+class ReplayServer:
+    def __init__(self):
+        self.connected = set()
+        self.sid_rooms = defaultdict(set)
+        self.manager = types.SimpleNamespace(
+            is_connected=lambda sid, namespace: sid in self.connected,
+            get_participants=lambda namespace, room: [(sid, sid) for sid in self.recipients(room)],
+        )
+
+    def enter_room(self, sid, room, namespace=None):
+        self.sid_rooms[sid].add(room)
+
+    def leave_room(self, sid, room, namespace=None):
+        self.sid_rooms[sid].discard(room)
+
+    def recipients(self, room):
+        return [sid for sid in self.connected if sid == room or room in self.sid_rooms[sid]]
+
+class ReplaySocketIO:
+    """Collects handlers registered with .on() and records every emit."""
+
+    def __init__(self):
+        self.handlers = {}
+        self.server = ReplayServer()
+        self.emit_counts = defaultdict(int)
+        self.emit_bytes = defaultdict(int)
+        self.background_tasks = []
+        # Once set, every sleep returns at once, so timers such as the reconnect grace period expire immediately
+        self.fast_forward = gevent.event.Event()
+
+    def on(self, event):
+        def decorator(fn):
+            self.handlers[event] = fn
+            return fn
+        return decorator
+
+    def emit(self, event, data=None, room=None, to=None, skip_sid=None, **kwargs):
+        target = to or room
+        skipped = skip_sid if isinstance(skip_sid, list) else [skip_sid]
+        recipients = len([sid for sid in (self.server.recipients(target) if target else self.server.connected) if sid not in skipped])
+        size = len(json.dumps(data, default=lambda value: 'x' * len(value) if isinstance(value, (bytes, bytearray)) else str(value)))
+        self.emit_counts[event] += recipients
+        self.emit_bytes[event] += size * recipients
+
+    def close_room(self, room, namespace=None):
+        for rooms in self.server.sid_rooms.values():
+            rooms.discard(room)
+
+    def start_background_task(self, target, *args, **kwargs):
+        task = gevent.spawn(target, *args, **kwargs)
+        self.background_tasks.append(task)
+        return task
+
+    def sleep(self, seconds):
+        self.fast_forward.wait(seconds)
+
+# --- Replay driver ---
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def replay(trace_paths, speed, model_latency, tts_latency, tts_bytes):
+    app = Flask(__name__)
+    socketio = ReplaySocketIO()
+    app.extensions['socketio'] = socketio
+    model = SimulatedModel(model_latency)
+
+    socket_handlers.speechsdk = speechsdk
+    socket_handlers.synthesize_speech = simulated_synthesize_speech(tts_latency, tts_bytes)
+    socket_handlers.get_translation_model = lambda target_lang_code, LANGUAGE_NAMES: model
+    socket_handlers.get_batch_model = lambda mode, source_language, LANGUAGE_NAMES: model
+    socket_handlers.register_handlers(socketio, 'replay-key', 'replay-region', SimulatedSpeechConfig(), LANGUAGE_VOICES, LANGUAGE_NAMES)
+
+    handler_latencies = defaultdict(list)
+    started_at = time.monotonic()
+
+    def dispatch(sid, event, data):
+        handler = socketio.handlers.get(event)
+        if not handler:
+            return
+        with app.test_request_context('/'):
+            flask.request.sid = sid
+            flask.request.namespace = '/'
+            began = time.perf_counter()
+            try:
+                if event in ('connect', 'disconnect', 'stop_translation', 'leave_broadcast', 'stop_broadcast'):
+                    handler()
+                else:
+                    handler(data)
+            except Exception as e:
+                print(f"Handler '{event}' failed for {sid}: {e}", file=sys.stderr)
+            handler_latencies[event].append(time.perf_counter() - began)
+
+    def run_session(index, path):
+        sid = f"replay-{index}"
+        for offset, event, data in read_trace(path):
+            if speed > 0:
+                delay = started_at + offset / speed - time.monotonic()
+                if delay > 0:
+                    gevent.sleep(delay)
+            if event == 'connect':
+                socketio.server.connected.add(sid)
+            dispatch(sid, event, data)
+            if event == 'disconnect':
+                socketio.server.connected.discard(sid)
+                socketio.server.sid_rooms.pop(sid, None)
+            gevent.sleep(0)
+
+    tracemalloc.start()
+    gevent.joinall([gevent.spawn(run_session, index, path) for index, path in enumerate(trace_paths)])
+    gevent.joinall(_callback_greenlets)
+    # Sessions still inside their reconnect grace period would otherwise be reported as leaked state
+    socketio.fast_forward.set()
+    gevent.joinall(socketio.background_tasks)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'sessions': len(trace_paths),
+        'speed': speed,
+        'wall_seconds': round(time.monotonic() - started_at, 3),
+        'peak_traced_memory_bytes': peak_memory,
+        'model_calls': model.calls,
+        'handlers': {
+            event: {
+                'count': len(values),
+                'p50_ms': round(_percentile(values, 0.5) * 1000, 3),
+                'p95_ms': round(_percentile(values, 0.95) * 1000, 3),
+                'max_ms': round(max(values) * 1000, 3),
+            }
+            for event, values in handler_latencies.items()
+        },
+        'emits': {event: {'messages': count, 'bytes': socketio.emit_bytes[event]} for event, count in socketio.emit_counts.items()},
+        'leftover_state': {
+            'clients': len(client_manager.clients),
+            'rooms': len(client_manager.rooms),
+            'sid_to_room': len(client_manager.sid_to_room),
+            'broadcasts': len(client_manager.broadcasts),
+            'broadcast_listeners': len(client_manager.listener_to_broadcast),
+            'suspended_sessions': len(client_manager.suspended_sessions),
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded session traces with simulated providers.")
+    parser.add_argument('traces', nargs='+', help="Trace files written with SESSION_TRACE_DIR enabled.")
+    parser.add_argument('--speed', type=float, default=1.0, help="Playback speed multiplier; 0 replays as fast as possible.")
+    parser.add_argument('--model-latency', type=float, default=0.3, help="Simulated Gemini latency in seconds.")
+    parser.add_argument('--tts-latency', type=float, default=0.2, help="Simulated TTS latency in seconds.")
+    parser.add_argument('--tts-bytes', type=int, default=24000, help="Size of each simulated TTS clip in bytes.")
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args()
+
+    report = replay(args.traces, args.speed, args.model_latency, args.tts_latency, args.tts_bytes)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(text)
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+'''
+This module transcribes uploaded recordings in batch.
+A recording is split on silence, the segments are recognized concurrently
+on separate push-stream recognizers, and the results are stitched back in order.
+'''
+import io
+import os
+import wave
+import audioop
+import logging
+from gevent import monkey
+from gevent.pool import Pool
+from gevent.threadpool import ThreadPool
+import azure.cognitiveservices.speech as speechsdk
+
+from src.hub_safety import run_blocking
+from src.translation_service import get_translation_prompt, get_translation_model
+from summary import get_summary_from_text
+
+# Number of segments recognized at the same time for one upload
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 4))
+# OS threads shared by all uploads for segment recognition, kept apart from
+# the hub's blocking pool so long batch jobs cannot starve live sessions
+BATCH_POOL_SIZE = int(os.getenv('BATCH_POOL_SIZE', 8))
+# Frames quieter than this RMS (16-bit samples) count as silence
+BATCH_SILENCE_RMS = int(os.getenv('BATCH_SILENCE_RMS', 500))
+FRAME_MS = 30
+MIN_SILENCE_MS = 400
+MIN_SEGMENT_MS = 5000
+MAX_SEGMENT_MS = 60000
+SEGMENT_TIMEOUT_SECONDS = 300
+
+# SDK callbacks fire on native threads, so segment completion is signalled with a real lock
+_allocate_native_lock = monkey.get_original('_thread', 'allocate_lock')
+
+_segment_pool = None
+
+def _get_segment_pool():
+    global _segment_pool
+    if _segment_pool is None:
+        _segment_pool = ThreadPool(BATCH_POOL_SIZE)
+    return _segment_pool
+
+def load_pcm(file_bytes):
+    """
+    Returns (pcm_bytes, sample_rate, channels) for a 16-bit PCM WAV upload.
+    Raises ValueError for anything else, so an unknown format is not transcribed as noise.
+    The PCM is returned as a memoryview so segments can be sliced without copying.
+    """
+    if file_bytes[:4] != b'RIFF':
+        raise ValueError("Only WAV files are supported.")
+    with wave.open(io.BytesIO(file_bytes)) as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError("Only 16-bit PCM WAV files are supported.")
+        return memoryview(wav.readframes(wav.getnframes())), wav.getframerate(), wav.getnchannels()
+
+def split_on_silence(pcm, sample_rate, channels):
+    """
+    Splits 16-bit PCM into [(start_ms, bytes)] segments.
+    Cuts fall in the middle of silent stretches once a segment is long enough,
+    and long stretches without silence are cut at MAX_SEGMENT_MS.
+    """
+    block_align = 2 * channels
+    bytes_per_ms = sample_rate * block_align / 1000
+    frame_bytes = int(sample_rate * FRAME_MS / 1000) * block_align
+    min_silence_bytes = MIN_SILENCE_MS * bytes_per_ms
+    min_segment_bytes = MIN_SEGMENT_MS * bytes_per_ms
+    max_segment_bytes = MAX_SEGMENT_MS * bytes_per_ms
+
+    cuts = []
+    segment_start = 0
+    silence_start = None
+    position = 0
+    while position < len(pcm):
+        frame = pcm[position:position + frame_bytes]
+        if audioop.rms(frame[:len(frame) // 2 * 2], 2) < BATCH_SILENCE_RMS:
+            if silence_start is None:
+                silence_start = position
+        elif silence_start is not None:
+            silence_bytes = position - silence_start
+            if silence_bytes >= min_silence_bytes and silence_start - segment_start >= min_segment_bytes:
+                cut = silence_start + (silence_bytes // 2) // block_align * block_align
+                cuts.append(cut)
+                segment_start = cut
+            silence_start = None
+        position += frame_bytes
+        if position - segment_start >= max_segment_bytes:
+            cuts.append(position)
+            segment_start = position
+            silence_start = None
+
+    boundaries = [0] + cuts + [len(pcm)]
+    return [
+        (int(start / bytes_per_ms), pcm[start:end])
+        for start, end in zip(boundaries, boundaries[1:])
+        if end > start
+    ]
+
+def recognize_segment(pcm, sample_rate, channels, language, speech_key, speech_region):
+    """Recognizes one PCM segment on its own push-stream recognizer. Blocks until done."""
+    speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=speech_region)
+    speech_config.speech_recognition_language = language
+    stream_format = speechsdk.audio.AudioStreamFormat(samples_per_second=sample_rate, bits_per_sample=16, channels=channels)
+    push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+    audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
+    recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
+
+    texts = []
+    finished = _allocate_native_lock()
+    finished.acquire()
+
+    def _on_recognized(evt):
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech and evt.result.text:
+            texts.append(evt.result.text)
+
+    def _on_stopped(evt):
+        try:
+            finished.release()
+        except RuntimeError:
+            pass  # Both canceled and session_stopped fire at end of stream
+
+    recognizer.recognized.connect(_on_recognized)
+    recognizer.session_stopped.connect(_on_stopped)
+    recognizer.canceled.connect(_on_stopped)
+
+    recognizer.start_continuous_recognition()
+    push_stream.write(bytes(pcm))
+    push_stream.close()
+    if not finished.acquire(timeout=SEGMENT_TIMEOUT_SECONDS):
+        logging.warning(f"Batch segment recognition timed out after {SEGMENT_TIMEOUT_SECONDS}s.")
+    recognizer.stop_continuous_recognition()
+    return ' '.join(texts)
+
+def process_recording(pcm, sample_rate, channels, language, speech_key, speech_region, LANGUAGE_NAMES, target_language=None, summarize=False):
+    """
+    Transcribes a recording and yields progress updates as dicts.
+    The last update is {'event': 'done', ...} with the stitched transcript and any translation or summary.
+    """
+    segments = _get_segment_pool().apply(split_on_silence, (pcm, sample_rate, channels))
+    total = len(segments)
+    logging.info(f"Batch transcription split recording into {total} segments.")
+    yield {'event': 'segmented', 'total': total}
+
+    pool = Pool(BATCH_CONCURRENCY)
+    texts = [''] * total
+
+    def _recognize(index):
+        start_ms, segment_pcm = segments[index]
+        try:
+            texts[index] = _get_segment_pool().apply(recognize_segment, (segment_pcm, sample_rate, channels, language, speech_key, speech_region))
+        except Exception as e:
+            logging.error(f"Batch recognition failed for segment {index} at {start_ms}ms: {e}")
+        return index
+
+    for completed, index in enumerate(pool.imap_unordered(_recognize, range(total)), 1):
+        yield {'event': 'progress', 'completed': completed, 'total': total, 'segment': index, 'start_ms': segments[index][0], 'text': texts[index]}
+
+    transcript = ' '.join(text for text in texts if text)
+    result = {
+        'event': 'done',
+        'transcript': transcript,
+        'segments': [{'start_ms': start_ms, 'text': text} for (start_ms, _), text in zip(segments, texts)]
+    }
+
+    if target_language and transcript:
+        def _translate(text):
+            if not text:
+                return ''
+            try:
+                prompt = get_translation_prompt(text, target_language, LANGUAGE_NAMES)
+                model = get_translation_model(target_language, LANGUAGE_NAMES)
+                return run_blocking(model.generate_content, prompt).text.strip()
+            except Exception as e:
+                logging.error(f"Gemini API error during batch translation: {e}")
+                return f"Translation error: {text}"
+
+        translations = list(pool.imap(_translate, texts))
+        for segment, translation in zip(result['segments'], translations):
+            segment['translated'] = translation
+        result['translation'] = ' '.join(text for text in translations if text)
+        yield {'event': 'translated'}
+
+    if summarize and transcript:
+        result['summary'] = get_summary_from_text(transcript, language, LANGUAGE_NAMES)
+
+    yield result
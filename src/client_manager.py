@@ -1,36 +1,281 @@
 '''
-This module manages the state of clients and chat rooms.
+This module manages the state of clients, chat rooms and broadcasts.
 '''
+import os
+import time
 import logging
+import secrets
+from collections import deque
+from src.hub_safety import run_blocking
 
 # Dictionary to hold recognizer and settings for each solo client
 clients = {}
 
 # Dictionary to hold information about active chat rooms
-# Structure: {room_id: {sid: {userId, language, tts_enabled, recognizer, stream}}}
+# Structure: {room_id: {sid: {userId, user_id, language, tts_enabled, language_room, recognizer, stream, created_at, last_active, audio_bytes}}}
 rooms = {}
 
 # Dictionary to map a client's sid to their room_id
 sid_to_room = {}
 
+# Seconds a dropped solo, chat or presenter session is held open for the client to resume it
+RECONNECT_GRACE_SECONDS = float(os.getenv('RECONNECT_GRACE_SECONDS', 30))
+# Audio a reconnected client may send before its session is reattached (5 s of 16 kHz 16-bit mono)
+RESUME_AUDIO_BUFFER_BYTES = int(os.getenv('RESUME_AUDIO_BUFFER_BYTES', 160000))
+
+# Resume tokens issued to solo, chat and presenter sessions, in both directions
+# Structure: {token: sid} and {sid: token}
+resume_tokens = {}
+session_tokens = {}
+
+# Dictionary to map the sid of a dropped, resumable session to when it was suspended
+suspended_sessions = {}
+
+# Audio received from sids that are resuming a session, kept until the session is reattached
+# Structure: {sid: bytearray}
+orphan_audio = {}
+
+# Sids whose resume_session, for a token that is still valid, is being handled
+resuming_sids = set()
+
+# Number of recent captions kept per language so late joiners can catch up
+BROADCAST_CAPTION_BACKLOG = 20
+
+# Dictionary to hold one-presenter, many-listener broadcasts.
+# Listeners only appear as counts per (language, tts_enabled); they hold no recognizer state.
+# Structure: {broadcast_id: {presenter_sid, language, tts_enabled, recognizer, stream, audiences: {(language, tts_enabled): count}, captions: {language: deque}, sequence}}
+broadcasts = {}
+
+# Dictionary to map a presenter's sid to their broadcast_id
+presenter_to_broadcast = {}
+
+# Dictionary to map a listener's sid to (broadcast_id, language, tts_enabled)
+listener_to_broadcast = {}
+
+def language_room(room_id, language, tts_enabled):
+    """Returns the sub-room name for members of a room sharing a language and TTS preference."""
+    return f"{room_id}:{language}:{'tts' if tts_enabled else 'text'}"
+
+def broadcast_room(broadcast_id):
+    """Returns the room name prefix for a broadcast, kept apart from chat room ids."""
+    return f"broadcast:{broadcast_id}"
+
+def new_broadcast(broadcast_id, presenter_sid, language, tts_enabled):
+    """Registers a broadcast for a presenter and returns its record."""
+    broadcasts[broadcast_id] = {
+        'presenter_sid': presenter_sid,
+        'language': language,
+        'tts_enabled': tts_enabled,
+        'recognizer': None,
+        'stream': None,
+        'audiences': {},
+        'captions': {language: deque(maxlen=BROADCAST_CAPTION_BACKLOG)},
+        'sequence': 0
+    }
+    presenter_to_broadcast[presenter_sid] = broadcast_id
+    return broadcasts[broadcast_id]
+
+def add_listener(sid, broadcast_id, language, tts_enabled):
+    """Counts a listener into a broadcast audience. Returns False if the broadcast does not exist."""
+    remove_listener(sid)
+    broadcast = broadcasts.get(broadcast_id)
+    if not broadcast:
+        return False
+    audience = (language, bool(tts_enabled))
+    broadcast['audiences'][audience] = broadcast['audiences'].get(audience, 0) + 1
+    broadcast['captions'].setdefault(language, deque(maxlen=BROADCAST_CAPTION_BACKLOG))
+    listener_to_broadcast[sid] = (broadcast_id, language, bool(tts_enabled))
+    return True
+
+def remove_listener(sid):
+    """Counts a listener out of their broadcast audience. Returns (broadcast_id, language, tts_enabled), if any."""
+    subscription = listener_to_broadcast.pop(sid, None)
+    if not subscription:
+        return None
+    broadcast_id, language, tts_enabled = subscription
+    audiences = broadcasts.get(broadcast_id, {}).get('audiences', {})
+    if (language, tts_enabled) in audiences:
+        audiences[(language, tts_enabled)] -= 1
+        if audiences[(language, tts_enabled)] <= 0:
+            del audiences[(language, tts_enabled)]
+    return subscription
+
+def end_broadcast(broadcast_id):
+    """Stops a broadcast's recognizer and forgets it. Returns the broadcast record, if any."""
+    broadcast = broadcasts.pop(broadcast_id, None)
+    if not broadcast:
+        return None
+    presenter_to_broadcast.pop(broadcast['presenter_sid'], None)
+    drop_resume_token(broadcast['presenter_sid'])
+    for sid, subscription in list(listener_to_broadcast.items()):
+        if subscription[0] == broadcast_id:
+            listener_to_broadcast.pop(sid, None)
+    _stop_broadcast_recognizer(broadcast)
+    logging.info(f"Ended broadcast {broadcast_id}.")
+    return broadcast
+
+def cleanup_broadcast_recognizer(broadcast_id):
+    """Stops a presenter's recognizer and stream while keeping the broadcast and its audience."""
+    if broadcast_id in broadcasts:
+        _stop_broadcast_recognizer(broadcasts[broadcast_id])
+        logging.info(f"Cleaned up presenter recognizer for broadcast {broadcast_id}")
+
+def _stop_broadcast_recognizer(broadcast):
+    if broadcast.get('recognizer'):
+        run_blocking(broadcast['recognizer'].stop_continuous_recognition)
+        broadcast['recognizer'] = None
+    if broadcast.get('stream'):
+        broadcast['stream'].close()
+        broadcast['stream'] = None
+
+def issue_resume_token(sid):
+    """Returns the resume token for a session, issuing one on first use."""
+    token = session_tokens.get(sid)
+    if not token:
+        token = secrets.token_urlsafe(24)
+        session_tokens[sid] = token
+        resume_tokens[token] = sid
+    return token
+
+def drop_resume_token(sid):
+    """Forgets a session's resume token and any suspension or orphaned audio for the sid."""
+    token = session_tokens.pop(sid, None)
+    resume_tokens.pop(token, None)
+    suspended_sessions.pop(sid, None)
+    orphan_audio.pop(sid, None)
+
+def suspend_session(sid):
+    """
+    Holds a disconnected sid's session open for RECONNECT_GRACE_SECONDS instead of tearing it down.
+    Returns the suspension time, or None if the session cannot be resumed.
+    """
+    if RECONNECT_GRACE_SECONDS <= 0 or sid not in session_tokens:
+        return None
+    if sid not in clients and sid not in rooms.get(sid_to_room.get(sid), {}) and sid not in presenter_to_broadcast:
+        return None
+    orphan_audio.pop(sid, None)
+    suspended_sessions[sid] = time.monotonic()
+    return suspended_sessions[sid]
+
+def is_suspended(sid):
+    """Returns True if the sid's session is suspended and still within its grace period."""
+    suspended_at = suspended_sessions.get(sid)
+    return suspended_at is not None and time.monotonic() - suspended_at < RECONNECT_GRACE_SECONDS
+
+def reattach_session(token, new_sid):
+    """
+    Moves a suspended session onto a reconnected client's sid and rotates its resume token.
+    Returns the old sid, or None if the token does not match a suspended session that still exists.
+    """
+    old_sid = resume_tokens.get(token)
+    if not old_sid or not is_suspended(old_sid) or new_sid in clients or new_sid in sid_to_room or new_sid in presenter_to_broadcast:
+        return None
+    # The session may have been torn down while suspended, e.g. by its recognizer stopping
+    if old_sid not in clients and old_sid not in rooms.get(sid_to_room.get(old_sid), {}) and old_sid not in presenter_to_broadcast:
+        return None
+
+    if old_sid in sid_to_room:
+        room_id = sid_to_room.pop(old_sid)
+        rooms[room_id][new_sid] = rooms[room_id].pop(old_sid)
+        rooms[room_id][new_sid]['language_room'] = None
+        sid_to_room[new_sid] = room_id
+    elif old_sid in clients:
+        clients[new_sid] = clients.pop(old_sid)
+
+    if old_sid in presenter_to_broadcast:
+        broadcast_id = presenter_to_broadcast.pop(old_sid)
+        presenter_to_broadcast[new_sid] = broadcast_id
+        broadcasts[broadcast_id]['presenter_sid'] = new_sid
+
+    drop_resume_token(old_sid)
+    issue_resume_token(new_sid)
+    return old_sid
+
+def buffer_orphan_audio(sid, data):
+    """
+    Keeps audio from a resuming sid, up to RESUME_AUDIO_BUFFER_BYTES.
+    Returns False, keeping nothing, for any other sid.
+    """
+    if sid not in resuming_sids:
+        return False
+    buffered = orphan_audio.setdefault(sid, bytearray())
+    room = RESUME_AUDIO_BUFFER_BYTES - len(buffered)
+    if room > 0:
+        buffered.extend(data[:room])
+    return True
+
+def detach_recognizer(recognizer):
+    """Disconnects every callback from a recognizer so it can be stopped or rewired."""
+    recognizer.recognized.disconnect_all()
+    recognizer.session_stopped.disconnect_all()
+    recognizer.canceled.disconnect_all()
+    recognizer.recognizing.disconnect_all()
+
+def mark_active(record, audio_bytes=0):
+    """Stamps a solo client or room member record with activity, for idle reaping and accounting."""
+    now = time.monotonic()
+    record.setdefault('created_at', now)
+    record['last_active'] = now
+    record['audio_bytes'] = record.get('audio_bytes', 0) + audio_bytes
+
 def cleanup_client(sid):
     """Stops a solo client's recognizer and stream gracefully."""
     if sid in clients:
         client_info = clients.get(sid)
         if client_info and client_info.get('recognizer'):
             logging.info(f"Gracefully stopping recognizer for solo client sid {sid}.")
-            client_info['recognizer'].stop_continuous_recognition()
+            run_blocking(client_info['recognizer'].stop_continuous_recognition)
         if client_info and client_info.get('stream'):
             client_info['stream'].close()
 
+def stop_client_recognizer(sid):
+    """Stops a solo client's recognizer and stream but keeps the client's session."""
+    client_info = clients.get(sid)
+    if not client_info:
+        return
+    if client_info.get('recognizer'):
+        # Detach first so session_stopped does not pop the whole client
+        detach_recognizer(client_info['recognizer'])
+        run_blocking(client_info['recognizer'].stop_continuous_recognition)
+        client_info['recognizer'] = None
+    if client_info.get('stream'):
+        client_info['stream'].close()
+        client_info['stream'] = None
+    logging.info(f"Stopped recognizer for solo client sid {sid}")
+
 def cleanup_chat_client_recognizer(sid, room_id):
     """Stops a chat client's recognizer and stream."""
     if room_id in rooms and sid in rooms.get(room_id, {}):
         client_info = rooms[room_id][sid]
         if client_info.get('recognizer'):
-            client_info['recognizer'].stop_continuous_recognition()
+            run_blocking(client_info['recognizer'].stop_continuous_recognition)
             client_info['recognizer'] = None
         if client_info.get('stream'):
             client_info['stream'].close()
             client_info['stream'] = None
         logging.info(f"Cleaned up chat recognizer for sid {sid} in room {room_id}")
+
+def remove_chat_member(sid):
+    """Stops a chat member's recognizer and removes them from their room. Returns the member record, if any."""
+    room_id = sid_to_room.pop(sid, None)
+    drop_resume_token(sid)
+    if room_id not in rooms or sid not in rooms[room_id]:
+        return None
+    cleanup_chat_client_recognizer(sid, room_id)
+    member = rooms[room_id].pop(sid)
+    if not rooms[room_id]:
+        del rooms[room_id]
+        logging.info(f"Room {room_id} is now empty and deleted.")
+    return member
+
+def remove_client(sid):
+    """Detaches a solo client's recognizer callbacks, stops it and drops the client. Returns the client record, if any."""
+    client_info = clients.pop(sid, None)
+    drop_resume_token(sid)
+    if client_info and client_info.get('recognizer'):
+        recognizer = client_info['recognizer']
+        detach_recognizer(recognizer)
+        run_blocking(recognizer.stop_continuous_recognition)
+    if client_info and client_info.get('stream'):
+        client_info['stream'].close()
+    return client_info
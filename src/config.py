@@ -14,6 +14,10 @@ load_dotenv()
 
 app = Flask(__name__, template_folder='../templates', static_folder='../static')
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'a-very-secret-key')
+# Uploaded recordings are held in memory while they are transcribed (200 MB is ~100 min of 16 kHz mono)
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', 200)) * 1024 * 1024
+# Lets a metrics scraper read /metrics without a login session; unset means only logged-in users can
+metrics_token = os.getenv('METRICS_TOKEN')
 # Use REDIS_URL from environment if available, otherwise fall back to local redis
 redis_url = os.getenv('REDIS_URL', 'redis://redis')
 socketio = SocketIO(app, async_mode='gevent', message_queue=redis_url)
@@ -40,7 +44,6 @@ google = oauth.register(
 try:
     gemini_api_key = os.environ["GEMINI_API_KEY"]
     genai.configure(api_key=gemini_api_key)
-    model = genai.GenerativeModel(model_name="gemini-2.5-flash-lite")
 except KeyError:
     raise RuntimeError("GEMINI_API_KEY not found in .env file. Please add it.")
 
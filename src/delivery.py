@@ -0,0 +1,223 @@
+'''
+This module delivers per-client emits.
+Sids connected to this worker are sent to directly, skipping the Redis
+message queue; only sids that live on another worker go through the queue.
+It also applies per-client backpressure so slow consumers cannot make
+the worker's outbound buffers grow without bound, and holds messages for
+suspended sessions until the client reconnects.
+'''
+import os
+import time
+import logging
+from collections import deque
+from src import metrics
+from src.hub_safety import on_hub_thread, call_on_hub
+
+NAMESPACE = '/'
+
+# Once a client's Engine.IO send queue holds this many packets, droppable messages are shed
+OUTBOUND_QUEUE_LIMIT = int(os.getenv('OUTBOUND_QUEUE_LIMIT', 32))
+# A client that sheds this many messages within the window is downgraded to text-only
+LAG_DOWNGRADE_DROPS = int(os.getenv('LAG_DOWNGRADE_DROPS', 20))
+LAG_WINDOW_SECONDS = float(os.getenv('LAG_WINDOW_SECONDS', 30))
+# Most messages held for a suspended session; older ones are discarded first
+RESUME_BUFFER_LIMIT = int(os.getenv('RESUME_BUFFER_LIMIT', 50))
+
+# How each event is treated when the client is behind:
+# 'interim' is discarded, 'audio' is skipped, 'mixed' is sent without its audio field.
+# Events not listed here (final text, errors, reports) are always sent.
+EVENT_POLICIES = {
+    'interim_result': 'interim',
+    'audio_synthesis_result': 'audio',
+    'report_audio': 'audio',
+    'chat_message': 'mixed',
+    'broadcast_caption': 'mixed',
+}
+
+# Per-sid lag accounting
+# Structure: {sid: {backlog, max_backlog, dropped, recent_drops, text_only}}
+client_lag = {}
+
+# Callbacks invoked with a sid when it is downgraded to text-only
+downgrade_handlers = []
+
+# Messages for suspended sessions, replayed when the client resumes
+# Structure: {sid: deque([(event, payload)])}
+held_messages = {}
+
+def is_local_sid(socketio, sid):
+    """Returns True if the sid is connected to this worker."""
+    try:
+        return bool(socketio.server.manager.is_connected(sid, NAMESPACE))
+    except Exception:
+        return False
+
+def outbound_backlog(socketio, sid):
+    """Returns the number of packets waiting in a local client's Engine.IO send queue."""
+    try:
+        server = socketio.server
+        eio_sid = server.manager.eio_sid_from_sid(sid, NAMESPACE)
+        eio_socket = server.eio.sockets.get(eio_sid)
+        return eio_socket.queue.qsize() if eio_socket else 0
+    except Exception:
+        return 0
+
+def payload_size(payload):
+    """Roughly estimates the wire size of an emit payload in bytes."""
+    if isinstance(payload, (bytes, bytearray)):
+        return len(payload)
+    if isinstance(payload, str):
+        return len(payload.encode('utf-8'))
+    if isinstance(payload, dict):
+        return sum(len(str(key)) + payload_size(value) for key, value in payload.items())
+    if isinstance(payload, (list, tuple)):
+        return sum(payload_size(item) for item in payload)
+    return 8
+
+def is_text_only(sid):
+    """Returns True if the sid has been downgraded to text-only delivery."""
+    return client_lag.get(sid, {}).get('text_only', False)
+
+def forget_sid(sid):
+    """Drops the lag accounting for a disconnected sid."""
+    client_lag.pop(sid, None)
+
+def hold(sid):
+    """Starts holding messages for a sid instead of emitting them."""
+    held_messages[sid] = deque(maxlen=RESUME_BUFFER_LIMIT)
+
+def release(sid):
+    """Stops holding messages for a sid and returns them as [(event, payload)]."""
+    return list(held_messages.pop(sid, ()))
+
+def _lag_state(sid):
+    if sid not in client_lag:
+        client_lag[sid] = {
+            'backlog': 0,
+            'max_backlog': 0,
+            'dropped': 0,
+            'recent_drops': deque(),
+            'text_only': False
+        }
+    return client_lag[sid]
+
+def _record_drop(sid, event, state):
+    now = time.monotonic()
+    state['dropped'] += 1
+    state['recent_drops'].append(now)
+    while state['recent_drops'] and now - state['recent_drops'][0] > LAG_WINDOW_SECONDS:
+        state['recent_drops'].popleft()
+    metrics.increment(f'delivery.dropped.{event}')
+
+    if not state['text_only'] and len(state['recent_drops']) >= LAG_DOWNGRADE_DROPS:
+        state['text_only'] = True
+        metrics.increment('delivery.text_only_downgrades')
+        logging.warning(f"Client {sid} is chronically lagging (backlog {state['backlog']}). Downgrading to text-only.")
+        for handler in list(downgrade_handlers):
+            try:
+                handler(sid)
+            except Exception as e:
+                logging.error(f"Downgrade handler failed for sid {sid}: {e}")
+
+def _apply_backpressure(socketio, event, payload, sid):
+    """Returns the payload to send to a local sid, or None if it should be dropped."""
+    policy = EVENT_POLICIES.get(event)
+    state = _lag_state(sid)
+    backlog = outbound_backlog(socketio, sid)
+    state['backlog'] = backlog
+    state['max_backlog'] = max(state['max_backlog'], backlog)
+    if policy is None:
+        return payload
+
+    behind = backlog >= OUTBOUND_QUEUE_LIMIT
+    if policy == 'interim' and behind:
+        _record_drop(sid, event, state)
+        return None
+    if policy == 'audio' and (behind or state['text_only']):
+        if behind:
+            _record_drop(sid, event, state)
+        return None
+    if policy == 'mixed' and (behind or state['text_only']) and payload.get('audio'):
+        if behind:
+            _record_drop(sid, event, state)
+        return dict(payload, audio=None)
+    return payload
+
+def deliver(socketio, event, payload, sid):
+    """
+    Emits an event to a single sid.
+    Local sids are written straight to their socket; remote sids fall back to the message queue.
+    Messages for held sids are buffered, except interim results, which are stale by the time anyone resumes.
+    Calls from SDK callback threads are handed to the hub, which owns the sockets' send queues.
+    """
+    if not on_hub_thread():
+        call_on_hub(deliver, socketio, event, payload, sid)
+        return
+    if sid in held_messages:
+        if EVENT_POLICIES.get(event) != 'interim':
+            held_messages[sid].append((event, payload))
+            metrics.increment('delivery.held_messages')
+        return
+    if is_local_sid(socketio, sid):
+        payload = _apply_backpressure(socketio, event, payload, sid)
+        if payload is None:
+            return
+        size = payload_size(payload)
+        socketio.emit(event, payload, room=sid, ignore_queue=True)
+        metrics.increment('delivery.local_messages')
+        metrics.increment('delivery.local_bytes', size)
+    else:
+        size = payload_size(payload)
+        socketio.emit(event, payload, room=sid)
+        metrics.increment('delivery.queued_messages')
+        metrics.increment('delivery.queued_bytes', size)
+        logging.debug(f"Queued '{event}' ({size} bytes) for remote sid {sid}.")
+
+def room_sids(socketio, room):
+    """Returns the sids in a room that are connected to this worker."""
+    try:
+        return [sid for sid, _ in socketio.server.manager.get_participants(NAMESPACE, room)]
+    except Exception:
+        return []
+
+def emit_to_room(socketio, event, payload, room):
+    """
+    Emits an event once to a room, with the same backpressure as deliver().
+    Local members that are behind or text-only are skipped by the room emit and sent
+    their own copy through deliver(), which drops or strips it and counts the drop.
+    """
+    if not on_hub_thread():
+        call_on_hub(emit_to_room, socketio, event, payload, room)
+        return
+
+    lagging = []
+    if EVENT_POLICIES.get(event):
+        for sid in room_sids(socketio, room):
+            if is_text_only(sid) or outbound_backlog(socketio, sid) >= OUTBOUND_QUEUE_LIMIT:
+                lagging.append(sid)
+
+    socketio.emit(event, payload, room=room, skip_sid=lagging or None)
+    metrics.increment('delivery.room_messages')
+    metrics.increment('delivery.room_bytes', payload_size(payload))
+    for sid in lagging:
+        deliver(socketio, event, payload, sid)
+
+# Histogram bounds for outbound backlog, in packets
+BACKLOG_BUCKETS = (0, 4, 16, OUTBOUND_QUEUE_LIMIT, 4 * OUTBOUND_QUEUE_LIMIT)
+
+def _lag_snapshot():
+    states = list(client_lag.values())
+    return {
+        'clients': len(states),
+        'text_only': sum(1 for state in states if state['text_only']),
+        'dropped': sum(state['dropped'] for state in states),
+        'backlog': metrics.distribution((state['backlog'] for state in states), BACKLOG_BUCKETS),
+        'max_backlog': metrics.distribution((state['max_backlog'] for state in states), BACKLOG_BUCKETS),
+    }
+
+def _held_snapshot():
+    held = [len(messages) for messages in list(held_messages.values())]
+    return {'sessions': len(held), 'messages': sum(held)}
+
+metrics.register_gauge('delivery.client_lag', _lag_snapshot)
+metrics.register_gauge('delivery.held', _held_snapshot)
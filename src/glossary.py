@@ -0,0 +1,159 @@
+'''
+This module provides glossary-aware term matching for translation prompts.
+Glossaries are JSON files under GLOSSARY_DIR, one per room or user:
+    glossaries/rooms/<room_id>.json
+    glossaries/users/<user_id>.json
+IDs are percent-encoded as UTF-8 to form the file name, so every ID maps to
+its own file: alice@example.com -> users/alice%40example.com.json and
+會議室 -> rooms/%E6%9C%83%E8%AD%B0%E5%AE%A4.json. IDs whose encoded name
+exceeds MAX_FILENAME_BYTES have no glossary.
+Each file maps a source term to either a translation for every language,
+a {language_code: translation} object, or "" to keep the term as-is.
+Glossaries are compiled into an Aho-Corasick automaton so each utterance
+is scanned once, in linear time, however large the glossary is. Compiled
+glossaries are cached and recompiled when the file changes on disk.
+'''
+import os
+import json
+import logging
+from collections import deque
+from urllib.parse import quote
+
+GLOSSARY_DIR = os.getenv('GLOSSARY_DIR', 'glossaries')
+MAX_FILENAME_BYTES = 255
+
+# Compiled glossaries by file path
+# Structure: {path: (mtime, GlossaryMatcher)}
+_compiled = {}
+
+def _is_word_char(char):
+    return char.isascii() and (char.isalnum() or char == '_')
+
+class GlossaryMatcher:
+    """An Aho-Corasick automaton over the lower-cased terms of one glossary."""
+
+    def __init__(self, entries):
+        self.entries = {}
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for term, translations in entries.items():
+            key = term.strip().lower()
+            if key:
+                self.entries[key] = (term.strip(), translations)
+                self._add(key)
+        self._link()
+
+    def _add(self, key):
+        state = 0
+        for char in key:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].append(key)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, text):
+        """Returns the glossary keys found in text, in order of first appearance."""
+        lowered = text.lower()
+        found = []
+        state = 0
+        for index, char in enumerate(lowered):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for key in self.output[state]:
+                start = index - len(key) + 1
+                # Latin terms must match whole words; CJK terms match anywhere
+                if _is_word_char(key[0]) and start > 0 and _is_word_char(lowered[start - 1]):
+                    continue
+                if _is_word_char(key[-1]) and index + 1 < len(lowered) and _is_word_char(lowered[index + 1]):
+                    continue
+                if key not in found:
+                    found.append(key)
+        return found
+
+    def lookup(self, text, target_lang_code):
+        """
+        Returns [(term, translation)] for glossary terms in text. An empty translation means keep the term.
+        Per-language entries with no translation for target_lang_code are skipped, so the model translates them freely.
+        """
+        matches = []
+        for key in self.find(text):
+            term, translations = self.entries[key]
+            if isinstance(translations, dict):
+                translation = translations.get(target_lang_code)
+                if translation is None:
+                    continue
+            else:
+                translation = translations or ''
+            matches.append((term, translation))
+        return matches
+
+def glossary_filename(scope_id):
+    """Returns the file name for a room or user ID, or None if the ID cannot have a glossary."""
+    # Nothing is left unescaped except unreserved characters, so no separators or traversal can appear
+    encoded = quote(str(scope_id), safe='')
+    if not encoded or encoded in ('.', '..'):
+        return None
+    filename = f"{encoded}.json"
+    return filename if len(filename) <= MAX_FILENAME_BYTES else None
+
+def _glossary_path(scope, scope_id):
+    filename = glossary_filename(scope_id)
+    return os.path.join(GLOSSARY_DIR, scope, filename) if filename else None
+
+def get_matcher(scope, scope_id):
+    """Returns the compiled glossary for a room or user, recompiling it if the file changed."""
+    path = _glossary_path(scope, scope_id)
+    if not path:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        _compiled.pop(path, None)
+        return None
+
+    cached = _compiled.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, encoding='utf-8') as glossary_file:
+            matcher = GlossaryMatcher(json.load(glossary_file))
+    except (OSError, ValueError) as e:
+        logging.error(f"Failed to load glossary {path}: {e}")
+        return cached[1] if cached else None
+    _compiled[path] = (mtime, matcher)
+    logging.info(f"Compiled glossary {path} with {len(matcher.entries)} terms.")
+    return matcher
+
+def match_glossary(text, target_lang_code, scopes):
+    """
+    Returns [(term, translation)] for every glossary term found in text.
+    scopes is a list of (scope, scope_id) pairs, e.g. [('rooms', room_id), ('users', user_id)];
+    later scopes override earlier ones for the same term.
+    """
+    merged = {}
+    for scope, scope_id in scopes:
+        if not scope_id:
+            continue
+        matcher = get_matcher(scope, scope_id)
+        if matcher:
+            for term, translation in matcher.lookup(text, target_lang_code):
+                merged[term.lower()] = (term, translation)
+    return list(merged.values())
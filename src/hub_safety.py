@@ -0,0 +1,133 @@
+'''
+This module keeps blocking native calls off the gevent hub.
+Azure Speech SDK waits and Gemini requests are not cooperative under
+monkey patching, so they are run on gevent's OS threadpool. A hub
+monitor records which handler stalled the event loop and for how long,
+timed from when the blocking greenlet was switched in.
+'''
+import os
+import sys
+import time
+import logging
+import gevent
+import greenlet
+from gevent import events, monkey
+from src import metrics
+
+BLOCKING_POOL_SIZE = int(os.getenv('BLOCKING_POOL_SIZE', 16))
+# The hub is reported as blocked when one greenlet runs longer than this many seconds
+HUB_MAX_BLOCKING_TIME = float(os.getenv('HUB_MAX_BLOCKING_TIME', 0.1))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_real_get_ident = monkey.get_original('_thread', 'get_ident')
+# This module is imported during app startup, on the thread that runs the hub
+_hub_thread_ident = _real_get_ident()
+_hub = gevent.get_hub()
+
+# Loop stalls grouped by the handler that was running
+# Structure: {handler: {count, total_seconds, max_seconds}}
+hub_blocks = {}
+
+# Set on the hub thread at every greenlet switch: (greenlet, switched_in_at) for the greenlet now running
+_running = None
+
+# The stall being tracked by the monitor thread; the switch tracer stamps ended_at when its greenlet switches out
+# Structure: {greenlet, started_at, handler, recorded_seconds, ended_at}
+_open_stall = None
+
+def run_blocking(fn, *args, **kwargs):
+    """
+    Calls fn on gevent's OS threadpool and waits for it cooperatively.
+    Calls made outside the hub thread (e.g. from SDK callback threads) run inline.
+    """
+    if not on_hub_thread():
+        return fn(*args, **kwargs)
+    return gevent.get_hub().threadpool.apply(fn, args, kwargs)
+
+def on_hub_thread():
+    """Returns True when called on the thread that runs the gevent hub."""
+    return _real_get_ident() == _hub_thread_ident
+
+def call_on_hub(fn, *args):
+    """
+    Runs fn in a new greenlet on the hub thread.
+    Native threads (SDK callbacks) must not touch gevent queues directly, so they hand work over
+    with the loop's thread-safe callback, which also wakes the hub.
+    """
+    if on_hub_thread():
+        return gevent.spawn(fn, *args)
+    _hub.loop.run_callback_threadsafe(gevent.spawn, fn, *args)
+    return None
+
+def _blocking_handler():
+    """Returns the outermost project function on the hub thread's current stack."""
+    frame = sys._current_frames().get(_hub_thread_ident)
+    handler = None
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(PROJECT_ROOT) and 'site-packages' not in filename and filename != os.path.abspath(__file__):
+            handler = frame.f_code.co_name
+        frame = frame.f_back
+    return handler
+
+def _trace_switch(event, args):
+    global _running
+    now = time.perf_counter()
+    stall = _open_stall
+    if stall is not None and _running is not None and _running[0] is stall['greenlet'] and stall['ended_at'] is None:
+        stall['ended_at'] = now
+    _running = (args[1], now) if event in ('switch', 'throw') else None
+
+def _record_stall_time(elapsed):
+    stats = hub_blocks[_open_stall['handler']]
+    stats['total_seconds'] += elapsed - _open_stall['recorded_seconds']
+    stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+    _open_stall['recorded_seconds'] = elapsed
+
+def _settle_stall(hub=None):
+    """Closes the open stall once its greenlet has switched out, recording how long it really ran."""
+    global _open_stall
+    if _open_stall is None:
+        return
+    if _open_stall['ended_at'] is None:
+        running = _running
+        if running is not None and running[0] is _open_stall['greenlet']:
+            return
+    else:
+        _record_stall_time(_open_stall['ended_at'] - _open_stall['started_at'])
+    logging.warning(f"gevent hub was blocked for {_open_stall['recorded_seconds']:.3f}s in {_open_stall['handler']}.")
+    _open_stall = None
+
+def _on_gevent_event(event):
+    # Called from gevent's monitoring thread, once per monitor tick for as long as the loop stays blocked
+    global _open_stall
+    if not isinstance(event, events.EventLoopBlocked):
+        return
+    _settle_stall()
+    now = time.perf_counter()
+    running = _running
+    started_at = running[1] if running is not None and running[0] is event.greenlet else now - event.blocking_time
+    if _open_stall is None:
+        handler = _blocking_handler() or '<unknown>'
+        hub_blocks.setdefault(handler, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})['count'] += 1
+        _open_stall = {'greenlet': event.greenlet, 'started_at': started_at, 'handler': handler, 'recorded_seconds': 0.0, 'ended_at': None}
+    _record_stall_time(now - _open_stall['started_at'])
+
+def install_hub_monitor():
+    """Sizes the blocking threadpool and starts gevent's loop-stall monitor."""
+    hub = gevent.get_hub()
+    hub.threadpool.maxsize = BLOCKING_POOL_SIZE
+    gevent.config.monitor_thread = True
+    gevent.config.max_blocking_time = HUB_MAX_BLOCKING_TIME
+    # Stalls are logged once, when they end, instead of as a stack report on every monitor tick
+    gevent.config.print_blocking_reports = False
+    events.subscribers.append(_on_gevent_event)
+    # Installed before the monitor's own tracer, which chains to it
+    greenlet.settrace(_trace_switch)
+    monitor = hub.start_periodic_monitoring_thread()
+    monitor.add_monitoring_function(_settle_stall, HUB_MAX_BLOCKING_TIME)
+    logging.info(f"gevent hub monitor started (threshold {HUB_MAX_BLOCKING_TIME}s, pool size {BLOCKING_POOL_SIZE}).")
+
+metrics.register_gauge('hub.blocks', lambda: {name: dict(stats) for name, stats in list(hub_blocks.items())})
+metrics.register_gauge('hub.threadpool_size', lambda: gevent.get_hub().threadpool.size)
@@ -0,0 +1,46 @@
+'''
+This module keeps lightweight in-process metrics for the worker.
+Counters are plain integers; gauges are callables evaluated on read.
+'''
+import threading
+
+# Monotonic counters, e.g. {'delivery.local_messages': 42}
+counters = {}
+
+# Named callables returning a JSON-serialisable value when a snapshot is taken
+gauges = {}
+
+_lock = threading.Lock()
+
+def increment(name, amount=1):
+    """Adds amount to the named counter, creating it if needed."""
+    with _lock:
+        counters[name] = counters.get(name, 0) + amount
+
+def register_gauge(name, fn):
+    """Registers a callable whose return value is reported under name."""
+    gauges[name] = fn
+
+def distribution(values, bounds):
+    """
+    Summarises values as a count, total, max and histogram, so a gauge stays the same size
+    however many sessions it covers. Each value is counted in the first bucket whose bound it does not exceed.
+    """
+    values = list(values)
+    buckets = {f'le_{bound}': 0 for bound in bounds}
+    buckets['inf'] = 0
+    for value in values:
+        bucket = next((f'le_{bound}' for bound in bounds if value <= bound), 'inf')
+        buckets[bucket] += 1
+    return {'count': len(values), 'total': sum(values), 'max': max(values, default=0), 'buckets': buckets}
+
+def snapshot():
+    """Returns the current value of every counter and gauge."""
+    with _lock:
+        data = dict(counters)
+    for name, fn in list(gauges.items()):
+        try:
+            data[name] = fn()
+        except Exception as e:
+            data[name] = f"error: {e}"
+    return data
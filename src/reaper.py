@@ -0,0 +1,212 @@
+'''
+This module periodically reaps idle or orphaned session state.
+Entries in clients, rooms, sid_to_room and broadcasts normally go away on the right
+socket event; the reaper catches the ones that don't, so worker memory
+stays flat over long uptimes. It also reports per-session accounting,
+including an estimate of the memory each session holds.
+'''
+import os
+import time
+import logging
+from src import metrics
+from src.delivery import deliver, is_local_sid, release, held_messages, payload_size
+from src.client_manager import clients, rooms, sid_to_room, cleanup_chat_client_recognizer, remove_chat_member, remove_client, stop_client_recognizer
+from src.client_manager import broadcasts, listener_to_broadcast, broadcast_room, language_room, cleanup_broadcast_recognizer, end_broadcast, remove_listener
+from src.client_manager import session_tokens, suspended_sessions, orphan_audio, drop_resume_token, is_suspended
+
+REAPER_INTERVAL_SECONDS = float(os.getenv('REAPER_INTERVAL_SECONDS', 30))
+# Solo sessions with no activity for this long are dropped
+SESSION_IDLE_TTL = float(os.getenv('SESSION_IDLE_TTL', 600))
+# Recognizers that have received no audio for this long are stopped
+RECOGNIZER_IDLE_TTL = float(os.getenv('RECOGNIZER_IDLE_TTL', 120))
+# Rooms where no member has been active for this long are closed
+ROOM_IDLE_TTL = float(os.getenv('ROOM_IDLE_TTL', 7200))
+# Rough native memory held by one Azure recognizer and its push-stream buffer; tune it against process RSS
+RECOGNIZER_MEMORY_BYTES = int(os.getenv('RECOGNIZER_MEMORY_BYTES', 4 * 1024 * 1024))
+
+# Histogram bounds for the accounting gauges
+MEMORY_BUCKETS = (64 * 1024, 1024 * 1024, RECOGNIZER_MEMORY_BYTES, 4 * RECOGNIZER_MEMORY_BYTES)
+IDLE_BUCKETS = (10, 60, int(RECOGNIZER_IDLE_TTL), int(SESSION_IDLE_TTL))
+
+def _idle_seconds(record, now):
+    return now - record.get('last_active', now)
+
+def reap_once(socketio):
+    """Runs a single reaping pass and returns the number of entries removed or stopped."""
+    now = time.monotonic()
+    reaped = 0
+
+    for sid, client_info in list(clients.items()):
+        if is_suspended(sid):
+            continue
+        idle = _idle_seconds(client_info, now)
+        connected = is_local_sid(socketio, sid)
+        # Clients whose recognizer was already stopped have been told once
+        recording = client_info.get('recognizer') is not None
+        if not connected or idle > SESSION_IDLE_TTL:
+            remove_client(sid)
+            metrics.increment('reaper.solo_sessions')
+            logging.info(f"Reaped solo session {sid} (idle {idle:.0f}s).")
+            reaped += 1
+        elif recording and idle > RECOGNIZER_IDLE_TTL:
+            stop_client_recognizer(sid)
+            metrics.increment('reaper.recognizers')
+            logging.info(f"Stopped idle solo recognizer for {sid} (idle {idle:.0f}s).")
+            reaped += 1
+        else:
+            continue
+        if connected and recording:
+            deliver(socketio, 'server_error', {'error': 'Recording stopped due to inactivity.'}, sid)
+
+    for room_id, members in list(rooms.items()):
+        room_idle = min((_idle_seconds(member, now) for member in members.values()), default=0)
+        # members is the live dict, so its size has to be taken before anyone is reaped
+        member_count = len(members)
+        if room_idle > ROOM_IDLE_TTL:
+            socketio.emit('status_update', {'message': f'Room {room_id} was closed due to inactivity.'}, room=room_id)
+            metrics.increment('reaper.rooms')
+            logging.info(f"Closing room {room_id} after {room_idle:.0f}s of inactivity.")
+
+        for sid, member in list(members.items()):
+            if is_suspended(sid):
+                continue
+            connected = is_local_sid(socketio, sid)
+            if room_idle > ROOM_IDLE_TTL or not connected:
+                remove_chat_member(sid)
+                if connected:
+                    socketio.server.leave_room(sid, room_id, namespace='/')
+                    if member.get('language_room'):
+                        socketio.server.leave_room(sid, member['language_room'], namespace='/')
+                metrics.increment('reaper.room_members')
+                logging.info(f"Reaped chat member {member.get('userId')} (sid: {sid}) from room {room_id}.")
+                reaped += 1
+            elif member.get('recognizer') and _idle_seconds(member, now) > RECOGNIZER_IDLE_TTL:
+                cleanup_chat_client_recognizer(sid, room_id)
+                metrics.increment('reaper.recognizers')
+                logging.info(f"Stopped idle chat recognizer for {sid} in room {room_id}.")
+                deliver(socketio, 'server_error', {'error': 'Recording stopped due to inactivity.'}, sid)
+                reaped += 1
+
+        if room_id in rooms and len(rooms[room_id]) != member_count:
+            socketio.emit('room_update', {'users': [{'userId': member['userId']} for member in rooms[room_id].values()]}, room=room_id)
+
+    for sid, room_id in list(sid_to_room.items()):
+        if sid not in rooms.get(room_id, {}):
+            sid_to_room.pop(sid, None)
+            reaped += 1
+
+    for broadcast_id, broadcast in list(broadcasts.items()):
+        idle = _idle_seconds(broadcast, now)
+        presenter_sid = broadcast['presenter_sid']
+        presenter_gone = not is_local_sid(socketio, presenter_sid) and not is_suspended(presenter_sid)
+        if presenter_gone or idle > ROOM_IDLE_TTL:
+            for language, tts_enabled in list(broadcast['audiences']):
+                audience_room = language_room(broadcast_room(broadcast_id), language, tts_enabled)
+                socketio.emit('broadcast_ended', {'broadcastId': broadcast_id, 'message': 'The broadcast ended.'}, room=audience_room)
+                socketio.close_room(audience_room)
+            end_broadcast(broadcast_id)
+            metrics.increment('reaper.broadcasts')
+            logging.info(f"Reaped broadcast {broadcast_id} (idle {idle:.0f}s).")
+            reaped += 1
+        elif broadcast.get('recognizer') and idle > RECOGNIZER_IDLE_TTL:
+            cleanup_broadcast_recognizer(broadcast_id)
+            metrics.increment('reaper.recognizers')
+            logging.info(f"Stopped idle presenter recognizer for broadcast {broadcast_id}.")
+            reaped += 1
+
+    # Resume state outlives its session when a grace-period timer never fired
+    for sid in set(session_tokens) | set(suspended_sessions) | set(orphan_audio):
+        if not is_suspended(sid) and not is_local_sid(socketio, sid):
+            drop_resume_token(sid)
+            release(sid)
+            reaped += 1
+
+    # Listeners hold no recognizer, only an audience count that would otherwise never drop
+    for sid in list(listener_to_broadcast):
+        if not is_local_sid(socketio, sid):
+            remove_listener(sid)
+            metrics.increment('reaper.broadcast_listeners')
+            reaped += 1
+
+    return reaped
+
+def _reap_forever(socketio):
+    while True:
+        socketio.sleep(REAPER_INTERVAL_SECONDS)
+        try:
+            reaped = reap_once(socketio)
+            if reaped:
+                logging.info(f"Reaper pass removed or stopped {reaped} entries.")
+        except Exception as e:
+            logging.error(f"Reaper pass failed: {e}")
+
+def start_reaper(socketio):
+    """Starts the periodic reaper as a background task."""
+    return socketio.start_background_task(_reap_forever, socketio)
+
+def _session_accounting():
+    """Summarises sessions by kind; per-sid figures are not exported, so the gauge stays the same size."""
+    now = time.monotonic()
+    sessions = {'solo': [], 'chat': [], 'broadcast': []}
+    for sid, client_info in list(clients.items()):
+        sessions['solo'].append(_record_accounting(sid, client_info, now))
+    for room_id, members in list(rooms.items()):
+        for sid, member in list(members.items()):
+            sessions['chat'].append(_record_accounting(sid, member, now))
+    for broadcast_id, broadcast in list(broadcasts.items()):
+        sessions['broadcast'].append(_record_accounting(broadcast['presenter_sid'], broadcast, now))
+    return {
+        kind: {
+            'sessions': len(records),
+            'suspended': sum(1 for record in records if record['suspended']),
+            'audio_bytes': sum(record['audio_bytes'] for record in records),
+            'estimated_bytes': metrics.distribution((record['estimated_bytes'] for record in records), MEMORY_BUCKETS),
+            'idle_seconds': metrics.distribution((record['idle_seconds'] for record in records), IDLE_BUCKETS),
+        }
+        for kind, records in sessions.items()
+    }
+
+def _record_accounting(sid, record, now):
+    return {
+        'suspended': sid in suspended_sessions,
+        'idle_seconds': _idle_seconds(record, now),
+        'audio_bytes': record.get('audio_bytes', 0),
+        'estimated_bytes': _estimated_session_bytes(sid, record),
+    }
+
+def _estimated_session_bytes(sid, record):
+    """Estimates the memory a session holds: buffered audio, held and backlogged messages, and its recognizer."""
+    estimate = len(orphan_audio.get(sid, b''))
+    estimate += sum(payload_size(payload) for _, payload in list(held_messages.get(sid, ())))
+    estimate += sum(payload_size(caption) for caption in list(record.get('captions', ())))
+    if record.get('recognizer') is not None:
+        estimate += RECOGNIZER_MEMORY_BYTES
+    return estimate
+
+def _handle_counts():
+    records = list(clients.values()) + [member for members in list(rooms.values()) for member in list(members.values())] + list(broadcasts.values())
+    return {
+        'solo_sessions': len(clients),
+        'rooms': len(rooms),
+        'room_members': sum(len(members) for members in list(rooms.values())),
+        'sid_to_room': len(sid_to_room),
+        'broadcasts': len(broadcasts),
+        'broadcast_listeners': len(listener_to_broadcast),
+        'suspended_sessions': len(suspended_sessions),
+        'resume_tokens': len(session_tokens),
+        'orphan_audio_bytes': sum(len(audio) for audio in list(orphan_audio.values())),
+        'recognizers': sum(1 for record in records if record.get('recognizer') is not None),
+        'streams': sum(1 for record in records if record.get('stream') is not None),
+    }
+
+def _process_rss_bytes():
+    """Returns the current resident set size, or None where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+metrics.register_gauge('sessions.handles', _handle_counts)
+metrics.register_gauge('sessions.accounting', _session_accounting)
+metrics.register_gauge('process.rss_bytes', _process_rss_bytes)
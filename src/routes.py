@@ -1,5 +1,11 @@
-from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify
+import json
+import wave
+import secrets
+from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify, Response, stream_with_context
 from summary import get_summary_from_text
+from src import metrics
+from src.config import speech_key, speech_region, metrics_token, LANGUAGE_NAMES
+from src.batch_transcription import load_pcm, process_recording
 
 main_bp = Blueprint('main', __name__)
 
@@ -36,6 +42,13 @@ def init_routes(app):
             return redirect(url_for('auth.login_page'))
         return render_template('chat.html')
 
+    @main_bp.route('/broadcast')
+    def broadcast_mode():
+        """Serves the broadcast listener HTML page."""
+        if 'user' not in session:
+            return redirect(url_for('auth.login'))
+        return render_template('broadcast.html')
+
     @main_bp.route('/conversation')
     def conversation_mode():
         """Serves the conversation mode HTML page."""
@@ -53,11 +66,44 @@ def init_routes(app):
         if not text or not language:
             return jsonify({'error': 'Missing text or language in request.'}), 400
 
-        summary = get_summary_from_text(text, language)
+        summary = get_summary_from_text(text, language, LANGUAGE_NAMES)
 
         if "Error:" in summary:
             return jsonify({'error': summary}), 500
 
         return jsonify({'summary': summary})
 
+    @main_bp.route('/transcribe_recording', methods=['POST'])
+    def transcribe_recording():
+        """Transcribes an uploaded WAV recording and streams progress as NDJSON."""
+        if 'user' not in session:
+            return jsonify({'error': 'Unauthorized.'}), 401
+        upload = request.files.get('file')
+        language = request.form.get('language')
+        target_language = request.form.get('targetLanguage')
+        summarize = request.form.get('summarize') == 'true'
+
+        if not upload or not language:
+            return jsonify({'error': 'Missing file or language in request.'}), 400
+
+        try:
+            pcm, sample_rate, channels = load_pcm(upload.read())
+        except (ValueError, wave.Error) as e:
+            return jsonify({'error': f'Unsupported recording: {e}'}), 400
+
+        def generate():
+            for update in process_recording(pcm, sample_rate, channels, language, speech_key, speech_region, LANGUAGE_NAMES,
+                                            target_language=target_language, summarize=summarize):
+                yield json.dumps(update, ensure_ascii=False) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    @main_bp.route('/metrics')
+    def metrics_snapshot():
+        """Returns the worker's in-process counters and gauges to logged-in users or a scraper sending X-Metrics-Token."""
+        token = request.headers.get('X-Metrics-Token', '')
+        if 'user' not in session and not (metrics_token and secrets.compare_digest(token, metrics_token)):
+            return jsonify({'error': 'Unauthorized.'}), 401
+        return jsonify(metrics.snapshot())
+
     app.register_blueprint(main_bp)
@@ -0,0 +1,86 @@
+'''
+This module records inbound socket events to per-session trace files.
+Recording is opt-in: set SESSION_TRACE_DIR to enable it.
+
+Each trace is an append-only binary file: the MAGIC header followed by
+one record per event, packed as RECORD_HEADER (seconds since the
+session's first event, event code, payload length) plus the payload.
+audio_data payloads are stored as raw bytes; all others as UTF-8 JSON.
+'''
+import os
+import json
+import time
+import struct
+import logging
+
+MAGIC = b'RTTRACE1'
+RECORD_HEADER = struct.Struct('<dBI')
+
+EVENT_CODES = {
+    'connect': 0,
+    'join_room': 1,
+    'update_user_settings': 2,
+    'start_chat_translation': 3,
+    'start_translation': 4,
+    'settings_changed': 5,
+    'audio_data': 6,
+    'stop_translation': 7,
+    'disconnect': 8,
+    'start_broadcast': 9,
+    'join_broadcast': 10,
+    'leave_broadcast': 11,
+    'stop_broadcast': 12,
+    'resume_session': 13,
+}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+TRACE_DIR = os.getenv('SESSION_TRACE_DIR')
+
+# Open trace files for sessions on this worker
+# Structure: {sid: {file, started_at}}
+open_traces = {}
+
+def _open_trace(sid):
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    path = os.path.join(TRACE_DIR, f"{int(time.time())}-{sid}.trace")
+    trace_file = open(path, 'ab')
+    trace_file.write(MAGIC)
+    open_traces[sid] = {'file': trace_file, 'started_at': time.monotonic()}
+    logging.info(f"Recording session trace for sid {sid} to {path}")
+    return open_traces[sid]
+
+def record_event(sid, event, data=None):
+    """Appends an inbound event to the sid's trace file when tracing is enabled."""
+    if not TRACE_DIR or event not in EVENT_CODES:
+        return
+    try:
+        trace = open_traces.get(sid) or _open_trace(sid)
+        if isinstance(data, (bytes, bytearray)):
+            payload = bytes(data)
+        else:
+            payload = json.dumps(data).encode('utf-8')
+        offset = time.monotonic() - trace['started_at']
+        trace['file'].write(RECORD_HEADER.pack(offset, EVENT_CODES[event], len(payload)))
+        trace['file'].write(payload)
+        if event == 'disconnect':
+            open_traces.pop(sid, None)
+            trace['file'].close()
+    except Exception as e:
+        logging.error(f"Failed to record '{event}' to session trace for sid {sid}: {e}")
+
+def read_trace(path):
+    """Yields (offset_seconds, event, data) tuples from a trace file."""
+    with open(path, 'rb') as trace_file:
+        if trace_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session trace file.")
+        while True:
+            header = trace_file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            offset, code, length = RECORD_HEADER.unpack(header)
+            payload = trace_file.read(length)
+            event = EVENT_NAMES.get(code)
+            if event == 'audio_data':
+                yield offset, event, payload
+            else:
+                yield offset, event, json.loads(payload.decode('utf-8'))
@@ -2,34 +2,102 @@
 This module contains all SocketIO event handlers.
 '''
 import logging
-from flask import request
+from collections import deque
+from flask import request, session
 from flask_socketio import emit, join_room, leave_room
 import azure.cognitiveservices.speech as speechsdk
 
 # Import from our new modules
 from src.speech_service import synthesize_speech
-from src.translation_service import get_translation_prompt, get_batch_prompt
-from src.client_manager import clients, rooms, sid_to_room, cleanup_client, cleanup_chat_client_recognizer
+from src.translation_service import get_translation_prompt, get_translation_model, get_batch_prompt, get_batch_model
+from src.client_manager import clients, rooms, sid_to_room, cleanup_client, cleanup_chat_client_recognizer, language_room, mark_active, remove_chat_member, remove_client
+from src.client_manager import broadcasts, presenter_to_broadcast, listener_to_broadcast, broadcast_room, new_broadcast, add_listener, remove_listener, end_broadcast, cleanup_broadcast_recognizer, BROADCAST_CAPTION_BACKLOG
+from src.client_manager import RECONNECT_GRACE_SECONDS, resume_tokens, suspended_sessions, orphan_audio, resuming_sids, issue_resume_token, drop_resume_token, suspend_session, reattach_session, buffer_orphan_audio, detach_recognizer
+from src.delivery import deliver, emit_to_room, is_local_sid, downgrade_handlers, forget_sid, hold, release
+from src.hub_safety import run_blocking, call_on_hub
+from src.session_trace import record_event
+from src.glossary import match_glossary
 from summary import get_summary_from_text
 from interview_coach import get_interview_feedback
 
-def register_handlers(socketio, model, speech_key, speech_region, speech_config, LANGUAGE_VOICES, LANGUAGE_NAMES):
+def register_handlers(socketio, speech_key, speech_region, speech_config, LANGUAGE_VOICES, LANGUAGE_NAMES):
+
+    def _subscribe_language_room(sid, room_id):
+        """Moves a member into the sub-room matching their current language and TTS setting."""
+        member = rooms.get(room_id, {}).get(sid)
+        if not member:
+            return
+        new_sub_room = language_room(room_id, member['language'], member['tts_enabled'])
+        old_sub_room = member.get('language_room')
+        if old_sub_room == new_sub_room:
+            return
+        if old_sub_room:
+            socketio.server.leave_room(sid, old_sub_room, namespace='/')
+        socketio.server.enter_room(sid, new_sub_room, namespace='/')
+        member['language_room'] = new_sub_room
+
+    def _downgrade_to_text_only(sid):
+        """Turns off TTS for a client that cannot keep up with its outbound traffic."""
+        room_id = sid_to_room.get(sid)
+        if room_id and sid in rooms.get(room_id, {}):
+            rooms[room_id][sid]['tts_enabled'] = False
+            _subscribe_language_room(sid, room_id)
+        elif sid in clients:
+            clients[sid]['tts_enabled'] = False
+        elif listener_to_broadcast.get(sid, (None, None, False))[2]:
+            broadcast_id, language, _ = _leave_broadcast_rooms(sid)
+            if add_listener(sid, broadcast_id, language, False):
+                socketio.server.enter_room(sid, language_room(broadcast_room(broadcast_id), language, False), namespace='/')
+        else:
+            return
+        deliver(socketio, 'status_update', {'message': 'Your connection is slow. Audio playback has been turned off.'}, sid)
+
+    downgrade_handlers.append(_downgrade_to_text_only)
+
+    def _connect_solo_recognizer(sid, speech_recognizer):
+        """Routes a solo recognizer's events to the given sid, replacing any earlier callbacks."""
+        detach_recognizer(speech_recognizer)
+        speech_recognizer.recognizing.connect(lambda evt: deliver(socketio, 'interim_result', {'text': evt.result.text}, sid))
+        speech_recognizer.recognized.connect(lambda evt: handle_final_recognition(evt, sid))
+        speech_recognizer.session_stopped.connect(lambda evt: _final_cleanup(sid, speech_recognizer))
+        speech_recognizer.canceled.connect(lambda evt: logging.info(f"Canceled event for sid {sid}."))
+
+    def _connect_broadcast_recognizer(sid, broadcast_id, speech_recognizer):
+        """Routes a presenter's recognizer events to the given sid and the broadcast, replacing any earlier callbacks."""
+        detach_recognizer(speech_recognizer)
+        # Interim results only go back to the presenter; listeners receive finished captions
+        speech_recognizer.recognizing.connect(lambda evt: deliver(socketio, 'interim_result', {'text': evt.result.text}, sid))
+        speech_recognizer.recognized.connect(lambda evt: handle_broadcast_recognition(evt, broadcast_id))
+        speech_recognizer.session_stopped.connect(lambda evt: logging.info(f"Broadcast session stopped for {broadcast_id}."))
+        speech_recognizer.canceled.connect(lambda evt: logging.info(f"Broadcast canceled event for {broadcast_id}."))
+
+    def _connect_chat_recognizer(sid, room_id, user_id, speech_recognizer):
+        """Routes a chat member's recognizer events to the given sid, replacing any earlier callbacks."""
+        detach_recognizer(speech_recognizer)
+        speech_recognizer.recognizing.connect(lambda evt: deliver(socketio, 'interim_result', {'text': evt.result.text}, sid))
+        speech_recognizer.recognized.connect(lambda evt: handle_chat_final_recognition(evt, sid, room_id, user_id))
+        speech_recognizer.session_stopped.connect(lambda evt: logging.info(f"Chat session stopped for {user_id} (sid: {sid})."))
+        speech_recognizer.canceled.connect(lambda evt: logging.info(f"Chat canceled event for {user_id} (sid: {sid})."))
 
     @socketio.on('join_room')
     def handle_join_room(data):
         sid = request.sid
+        record_event(sid, 'join_room', data)
         room_id = data.get('roomId')
         user_id = data.get('userId')
         language = data.get('language')
         tts_enabled = data.get('ttsEnabled', False)
 
         if not room_id or not user_id or not language:
-            emit('server_error', {'error': 'Room ID, User ID, and Language are required to join a room.'}, room=sid)
+            deliver(socketio, 'server_error', {'error': 'Room ID, User ID, and Language are required to join a room.'}, sid)
             return
 
         if sid in sid_to_room:
             old_room_id = sid_to_room[sid]
             if sid in rooms.get(old_room_id, {}):
+                old_sub_room = rooms[old_room_id][sid].get('language_room')
+                if old_sub_room:
+                    leave_room(old_sub_room, sid=sid)
                 del rooms[old_room_id][sid]
                 if not rooms[old_room_id]:
                     del rooms[old_room_id]
@@ -44,19 +112,26 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
 
         rooms[room_id][sid] = {
             'userId': user_id,
+            # The signed-in account, not the client-supplied userId, scopes the member's glossary
+            'user_id': session.get('user', {}).get('email'),
             'language': language,
             'tts_enabled': tts_enabled,
+            'language_room': None,
             'recognizer': None,
             'stream': None
         }
+        mark_active(rooms[room_id][sid])
+        _subscribe_language_room(sid, room_id)
         logging.info(f"Client {user_id} (sid: {sid}) joined room {room_id} with language {language}.")
 
         emit('room_update', {'users': [{'userId': member['userId']} for member in rooms[room_id].values()]}, room=room_id)
-        emit('status_update', {'message': f'Joined room {room_id}. Start speaking!'}, room=sid)
+        deliver(socketio, 'status_update', {'message': f'Joined room {room_id}. Start speaking!'}, sid)
+        deliver(socketio, 'resume_token', {'token': issue_resume_token(sid)}, sid)
 
     @socketio.on('update_user_settings')
     def handle_update_user_settings(data):
         sid = request.sid
+        record_event(sid, 'update_user_settings', data)
         language = data.get('language')
         tts_enabled = data.get('ttsEnabled', False)
         room_id = sid_to_room.get(sid)
@@ -65,6 +140,8 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
             user_id = rooms[room_id][sid].get('userId')
             rooms[room_id][sid]['language'] = language
             rooms[room_id][sid]['tts_enabled'] = tts_enabled
+            mark_active(rooms[room_id][sid])
+            _subscribe_language_room(sid, room_id)
             logging.info(f"[Chat] User {user_id} in room {room_id} updated settings: language={language}, tts_enabled={tts_enabled}")
         else:
             logging.warning(f"[Chat] update_user_settings: sid {sid} not found in any room.")
@@ -72,13 +149,14 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
     @socketio.on('start_chat_translation')
     def handle_start_chat_translation(data):
         sid = request.sid
+        record_event(sid, 'start_chat_translation', data)
         room_id = data.get('roomId')
         user_id = data.get('userId')
         language = data.get('language')
         tts_enabled = data.get('ttsEnabled', False)
 
         if sid not in rooms.get(room_id, {}):
-            emit('server_error', {'error': 'Not in a valid room.'}, room=sid)
+            deliver(socketio, 'server_error', {'error': 'Not in a valid room.'}, sid)
             return
 
         if rooms[room_id][sid].get('recognizer'):
@@ -101,16 +179,15 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
                 'language': language,
                 'tts_enabled': tts_enabled
             })
+            mark_active(rooms[room_id][sid])
+            _subscribe_language_room(sid, room_id)
 
-            speech_recognizer.recognizing.connect(lambda evt: socketio.emit('interim_result', {'text': evt.result.text}, room=sid))
-            speech_recognizer.recognized.connect(lambda evt: handle_chat_final_recognition(evt, sid, room_id, user_id))
-            speech_recognizer.session_stopped.connect(lambda evt: logging.info(f"Chat session stopped for {user_id} (sid: {sid})."))
-            speech_recognizer.canceled.connect(lambda evt: logging.info(f"Chat canceled event for {user_id} (sid: {sid})."))
-            
-            speech_recognizer.start_continuous_recognition()
+            _connect_chat_recognizer(sid, room_id, user_id, speech_recognizer)
+
+            run_blocking(speech_recognizer.start_continuous_recognition)
         except Exception as e:
             logging.error(f"Failed to start chat recognizer for {user_id} (sid: {sid}): {e}")
-            emit('server_error', {'error': 'Failed to initialize speech recognizer for chat.'}, room=sid)
+            deliver(socketio, 'server_error', {'error': 'Failed to initialize speech recognizer for chat.'}, sid)
 
     def handle_final_recognition(evt, sid):
         if sid not in clients:
@@ -136,7 +213,7 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
                     error_message = "Azure authentication failed. Check API key or subscription status."
                 elif "websocket" in error_details.lower() or "connection" in error_details.lower():
                     error_message = "Network connection issue with Azure service."
-                socketio.emit('server_error', {"error": error_message}, room=sid)
+                deliver(socketio, 'server_error', {"error": error_message}, sid)
             return
 
         client_info = clients.get(sid)
@@ -169,24 +246,25 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
         tts_enabled = client_info['tts_enabled']
 
         try:
-            prompt = get_translation_prompt(text, target_lang, LANGUAGE_NAMES)
-            response = model.generate_content(prompt)
+            glossary_entries = match_glossary(text, target_lang, [('users', client_info.get('user_id'))])
+            prompt = get_translation_prompt(text, target_lang, LANGUAGE_NAMES, glossary_entries)
+            response = run_blocking(get_translation_model(target_lang, LANGUAGE_NAMES).generate_content, prompt)
             refined_text = response.text.strip()
             logging.info(f"Translated text for sid {sid}: '{refined_text}'")
             
-            socketio.emit('final_result', {
+            deliver(socketio, 'final_result', {
                 "original": text,
                 "refined": refined_text,
                 "source_lang": source_lang,
                 "target_lang": target_lang
-            }, room=sid)
+            }, sid)
 
             if tts_enabled:
                 synthesize_speech(refined_text, target_lang, sid, socketio, speech_config, LANGUAGE_VOICES)
 
         except Exception as e:
             logging.error(f"Gemini API error for sid {sid}: {e}")
-            socketio.emit('server_error', {"error": "Translation failed due to Gemini API error."})
+            deliver(socketio, 'server_error', {"error": "Translation failed due to Gemini API error."}, sid)
 
     def handle_chat_final_recognition(evt, sid, room_id, sender_user_id):
         text = evt.result.text
@@ -203,7 +281,7 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
             if cancellation_details.reason == speechsdk.CancellationReason.Error:
                 error_details = cancellation_details.error_details
                 logging.error(f"Error details for {sender_user_id} (sid: {sid}): {error_details}")
-                emit('server_error', {"error": "Speech recognition failed in chat."}, room=sid)
+                deliver(socketio, 'server_error', {"error": "Speech recognition failed in chat."}, sid)
             return
 
         logging.info(f"Recognized speech from {sender_user_id} (sid: {sid}) in room {room_id}: '{text}'")
@@ -212,45 +290,243 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
             logging.warning(f"Room {room_id} not found for sid {sid}.")
             return
 
-        for recipient_sid, recipient_info in list(rooms.get(room_id, {}).items()):
-            recipient_lang = recipient_info['language']
-            recipient_tts_enabled = recipient_info['tts_enabled']
+        sender_info = rooms[room_id].get(sid, {})
+        sender_lang = sender_info.get('language')
+
+        # Group members by language so each translation and TTS clip is produced once,
+        # then emitted once to the matching language sub-room instead of once per member.
+        audiences = {}
+        for member in list(rooms.get(room_id, {}).values()):
+            audiences.setdefault(member['language'], set()).add(bool(member['tts_enabled']))
 
+        for recipient_lang, tts_settings in audiences.items():
             translated_text = text
 
-            if recipient_lang != rooms[room_id][sid]['language']:
+            if recipient_lang != sender_lang:
                 try:
-                    prompt = get_translation_prompt(text, recipient_lang, LANGUAGE_NAMES)
-                    response = model.generate_content(prompt)
+                    glossary_entries = match_glossary(text, recipient_lang, [('rooms', room_id), ('users', sender_info.get('user_id'))])
+                    prompt = get_translation_prompt(text, recipient_lang, LANGUAGE_NAMES, glossary_entries)
+                    response = run_blocking(get_translation_model(recipient_lang, LANGUAGE_NAMES).generate_content, prompt)
                     translated_text = response.text.strip()
-                    logging.info(f"Translated for {recipient_info['userId']} (sid: {recipient_sid}): '{translated_text}'")
+                    logging.info(f"Translated for {recipient_lang} listeners in room {room_id}: '{translated_text}'")
                 except Exception as e:
-                    logging.error(f"Gemini API error translating for {recipient_info['userId']} (sid: {recipient_sid}): {e}")
+                    logging.error(f"Gemini API error translating to {recipient_lang} in room {room_id}: {e}")
                     translated_text = f"Translation error: {text}"
 
+            message = {
+                "senderId": sender_user_id,
+                "original": text,
+                "translated": translated_text,
+                "audio": None
+            }
+
+            if False in tts_settings:
+                emit_to_room(socketio, 'chat_message', message, language_room(room_id, recipient_lang, False))
+
             audio_data = None
-            if recipient_tts_enabled:
+            if True in tts_settings:
                 try:
-                    # Call the modified synthesize_speech and get the audio data back
-                    audio_data = synthesize_speech(translated_text, recipient_lang, recipient_sid, socketio, speech_config, LANGUAGE_VOICES, event_name='chat_audio_result')
+                    audio_data = synthesize_speech(translated_text, recipient_lang, language_room(room_id, recipient_lang, True), socketio, speech_config, LANGUAGE_VOICES, event_name='chat_audio_result')
                 except Exception as e:
-                    logging.error(f"Error during TTS for {recipient_info['userId']} (sid: {recipient_sid}): {e}")
+                    logging.error(f"Error during TTS for {recipient_lang} listeners in room {room_id}: {e}")
+                # The audio clip is shipped once for every member of this sub-room
+                emit_to_room(socketio, 'chat_message', dict(message, audio=audio_data), language_room(room_id, recipient_lang, True))
 
-            # Emit a single message containing text and audio data
-            socketio.emit('chat_message', {
-                "senderId": sender_user_id,
-                "original": text,
-                "translated": translated_text,
-                "audio": audio_data  # This will now contain the audio data if TTS was successful
-            }, room=recipient_sid)
+            # Suspended members have left every socket room; their copy is held until they resume
+            for member_sid, member in list(rooms.get(room_id, {}).items()):
+                if member['language'] == recipient_lang and member_sid in suspended_sessions:
+                    deliver(socketio, 'chat_message', dict(message, audio=audio_data if member['tts_enabled'] else None), member_sid)
+
+    @socketio.on('start_broadcast')
+    def handle_start_broadcast(data):
+        sid = request.sid
+        record_event(sid, 'start_broadcast', data)
+        broadcast_id = data.get('broadcastId')
+        language = data.get('language')
+        tts_enabled = data.get('ttsEnabled', False)
+
+        if not broadcast_id or not language:
+            deliver(socketio, 'server_error', {'error': 'Broadcast ID and Language are required to start a broadcast.'}, sid)
+            return
+
+        broadcast = broadcasts.get(broadcast_id)
+        if broadcast and broadcast['presenter_sid'] != sid:
+            deliver(socketio, 'server_error', {'error': f'Broadcast {broadcast_id} already has a presenter.'}, sid)
+            return
+
+        if broadcast:
+            logging.warning(f"Presenter {sid} restarted broadcast {broadcast_id}. Cleaning up previous recognizer.")
+            cleanup_broadcast_recognizer(broadcast_id)
+            broadcast['language'] = language
+            broadcast['tts_enabled'] = tts_enabled
+            broadcast['captions'].setdefault(language, deque(maxlen=BROADCAST_CAPTION_BACKLOG))
+        else:
+            if sid in presenter_to_broadcast:
+                end_broadcast(presenter_to_broadcast[sid])
+            broadcast = new_broadcast(broadcast_id, sid, language, tts_enabled)
+
+        logging.info(f"Starting broadcast {broadcast_id} for presenter {sid}: Language={language}")
+
+        try:
+            client_speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=speech_region)
+            client_speech_config.speech_recognition_language = language
+
+            push_stream = speechsdk.audio.PushAudioInputStream()
+            audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
+            speech_recognizer = speechsdk.SpeechRecognizer(speech_config=client_speech_config, audio_config=audio_config)
+
+            broadcast.update({
+                'recognizer': speech_recognizer,
+                'stream': push_stream
+            })
+            mark_active(broadcast)
+
+            _connect_broadcast_recognizer(sid, broadcast_id, speech_recognizer)
+
+            run_blocking(speech_recognizer.start_continuous_recognition)
+            deliver(socketio, 'status_update', {'message': f'Broadcast {broadcast_id} is live. Start speaking!'}, sid)
+            deliver(socketio, 'resume_token', {'token': issue_resume_token(sid)}, sid)
+        except Exception as e:
+            logging.error(f"Failed to start broadcast recognizer for {broadcast_id} (sid: {sid}): {e}")
+            deliver(socketio, 'server_error', {'error': 'Failed to initialize speech recognizer for broadcast.'}, sid)
+
+    def handle_broadcast_recognition(evt, broadcast_id):
+        text = evt.result.text
+
+        if evt.result.reason != speechsdk.ResultReason.RecognizedSpeech or not text:
+            if evt.result.reason == speechsdk.ResultReason.Canceled:
+                logging.error(f"Broadcast recognition canceled for {broadcast_id}: Reason={evt.result.cancellation_details.reason}")
+            return
+
+        broadcast = broadcasts.get(broadcast_id)
+        if not broadcast:
+            logging.warning(f"Received recognition result for an ended broadcast: {broadcast_id}")
+            return
+
+        source_lang = broadcast['language']
+        broadcast['sequence'] += 1
+        logging.info(f"Recognized speech in broadcast {broadcast_id}: '{text}'")
+
+        # Each subscribed language is translated and synthesized once, however many listeners it has.
+        # The source language is always captioned so late joiners in any language have a fallback.
+        audiences = {source_lang: set()}
+        for (recipient_lang, tts_enabled), count in list(broadcast['audiences'].items()):
+            if count > 0:
+                audiences.setdefault(recipient_lang, set()).add(tts_enabled)
+
+        # Languages are handled concurrently on the hub, so one slow translation does not hold up
+        # the others, and the SDK callback thread is free for the next utterance right away
+        for recipient_lang, tts_settings in audiences.items():
+            call_on_hub(_publish_broadcast_caption, broadcast_id, broadcast['sequence'], text, source_lang, recipient_lang, tts_settings)
+
+    def _publish_broadcast_caption(broadcast_id, sequence, text, source_lang, recipient_lang, tts_settings):
+        translated_text = text
+
+        if recipient_lang != source_lang:
+            try:
+                glossary_entries = match_glossary(text, recipient_lang, [('rooms', broadcast_id)])
+                prompt = get_translation_prompt(text, recipient_lang, LANGUAGE_NAMES, glossary_entries)
+                response = run_blocking(get_translation_model(recipient_lang, LANGUAGE_NAMES).generate_content, prompt)
+                translated_text = response.text.strip()
+            except Exception as e:
+                logging.error(f"Gemini API error translating broadcast {broadcast_id} to {recipient_lang}: {e}")
+                translated_text = f"Translation error: {text}"
+
+        broadcast = broadcasts.get(broadcast_id)
+        if not broadcast:
+            return
+
+        # Captions of consecutive utterances can finish out of order; sequence lets listeners sort them
+        caption = {
+            "broadcastId": broadcast_id,
+            "sequence": sequence,
+            "original": text,
+            "translated": translated_text,
+            "language": recipient_lang,
+            "audio": None
+        }
+        broadcast['captions'].setdefault(recipient_lang, deque(maxlen=BROADCAST_CAPTION_BACKLOG)).append(caption)
+
+        emit_to_room(socketio, 'broadcast_caption', caption, language_room(broadcast_room(broadcast_id), recipient_lang, False))
+
+        if True in tts_settings:
+            audio_data = None
+            try:
+                audio_data = synthesize_speech(translated_text, recipient_lang, language_room(broadcast_room(broadcast_id), recipient_lang, True), socketio, speech_config, LANGUAGE_VOICES, event_name='chat_audio_result')
+            except Exception as e:
+                logging.error(f"Error during TTS for broadcast {broadcast_id} in {recipient_lang}: {e}")
+            emit_to_room(socketio, 'broadcast_caption', dict(caption, audio=audio_data), language_room(broadcast_room(broadcast_id), recipient_lang, True))
+
+    def _leave_broadcast_rooms(sid):
+        subscription = remove_listener(sid)
+        if subscription:
+            broadcast_id, language, tts_enabled = subscription
+            socketio.server.leave_room(sid, language_room(broadcast_room(broadcast_id), language, tts_enabled), namespace='/')
+        return subscription
+
+    @socketio.on('join_broadcast')
+    def handle_join_broadcast(data):
+        sid = request.sid
+        record_event(sid, 'join_broadcast', data)
+        broadcast_id = data.get('broadcastId')
+        language = data.get('language')
+        tts_enabled = bool(data.get('ttsEnabled', False))
+
+        if not broadcast_id or not language:
+            deliver(socketio, 'server_error', {'error': 'Broadcast ID and Language are required to join a broadcast.'}, sid)
+            return
+
+        _leave_broadcast_rooms(sid)
+        if not add_listener(sid, broadcast_id, language, tts_enabled):
+            deliver(socketio, 'server_error', {'error': f'Broadcast {broadcast_id} is not live.'}, sid)
+            return
+        socketio.server.enter_room(sid, language_room(broadcast_room(broadcast_id), language, tts_enabled), namespace='/')
+        logging.info(f"Listener {sid} joined broadcast {broadcast_id} with language {language}.")
+
+        # Late joiners catch up from the caption buffer; until their language has captions
+        # of its own they get the presenter's original text.
+        broadcast = broadcasts[broadcast_id]
+        backlog = sorted(broadcast['captions'].get(language, ()), key=lambda caption: caption['sequence'])
+        if not backlog:
+            backlog = [dict(caption, translated=caption['original'], language=broadcast['language']) for caption in sorted(broadcast['captions'].get(broadcast['language'], ()), key=lambda caption: caption['sequence'])]
+        deliver(socketio, 'broadcast_backlog', {'broadcastId': broadcast_id, 'captions': backlog}, sid)
+
+    @socketio.on('leave_broadcast')
+    def handle_leave_broadcast():
+        sid = request.sid
+        record_event(sid, 'leave_broadcast')
+        subscription = _leave_broadcast_rooms(sid)
+        if subscription:
+            logging.info(f"Listener {sid} left broadcast {subscription[0]}.")
+
+    def _end_broadcast(broadcast_id, message):
+        broadcast = broadcasts.get(broadcast_id)
+        if not broadcast:
+            return
+        for language, tts_enabled in list(broadcast['audiences']):
+            audience_room = language_room(broadcast_room(broadcast_id), language, tts_enabled)
+            socketio.emit('broadcast_ended', {'broadcastId': broadcast_id, 'message': message}, room=audience_room)
+            socketio.close_room(audience_room)
+        end_broadcast(broadcast_id)
+
+    @socketio.on('stop_broadcast')
+    def handle_stop_broadcast():
+        sid = request.sid
+        record_event(sid, 'stop_broadcast')
+        broadcast_id = presenter_to_broadcast.get(sid)
+        if broadcast_id:
+            _end_broadcast(broadcast_id, 'The presenter ended the broadcast.')
+            deliver(socketio, 'status_update', {'message': f'Broadcast {broadcast_id} ended.'}, sid)
 
     @socketio.on('connect')
     def handle_connect():
         logging.info(f"Client connected: {request.sid}")
+        record_event(request.sid, 'connect')
 
     @socketio.on('start_translation')
     def handle_start_translation(data):
         sid = request.sid
+        record_event(sid, 'start_translation', data)
         if sid in clients:
             logging.warning(f"Found existing client session for {sid}. Cleaning up before starting new one.")
             cleanup_client(sid)
@@ -268,6 +544,7 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
             client_info = {
                 'stream': push_stream,
                 'tts_enabled': tts_enabled,
+                'user_id': session.get('user', {}).get('email'),
             }
 
             if candidate_languages and len(candidate_languages) > 1:
@@ -297,20 +574,20 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
 
             client_info['recognizer'] = speech_recognizer
             clients[sid] = client_info
+            mark_active(client_info)
 
-            speech_recognizer.recognizing.connect(lambda evt: socketio.emit('interim_result', {'text': evt.result.text}, room=sid))
-            speech_recognizer.recognized.connect(lambda evt: handle_final_recognition(evt, sid))
-            speech_recognizer.session_stopped.connect(lambda evt: _final_cleanup(sid, speech_recognizer))
-            speech_recognizer.canceled.connect(lambda evt: logging.info(f"Canceled event for sid {sid}."))
-            
-            speech_recognizer.start_continuous_recognition()
+            _connect_solo_recognizer(sid, speech_recognizer)
+
+            run_blocking(speech_recognizer.start_continuous_recognition)
+            deliver(socketio, 'resume_token', {'token': issue_resume_token(sid)}, sid)
         except Exception as e:
             logging.error(f"Failed to start recognizer for sid {sid}: {e}")
-            socketio.emit('server_error', {"error": "Failed to initialize speech recognizer."})
+            deliver(socketio, 'server_error', {"error": "Failed to initialize speech recognizer."}, sid)
 
     @socketio.on('settings_changed')
     def handle_settings_changed(data):
         sid = request.sid
+        record_event(sid, 'settings_changed', data)
         logging.info(f"Settings changed for sid {sid}. Restarting translation process.")
         
         client_info = clients.get(sid)
@@ -352,47 +629,67 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
                 'stream': push_stream,
                 'source_lang': source_lang,
                 'target_lang': target_lang,
-                'tts_enabled': tts_enabled
+                'tts_enabled': tts_enabled,
+                'user_id': session.get('user', {}).get('email')
             }
+            mark_active(clients[sid])
 
-            speech_recognizer.recognizing.connect(lambda evt: socketio.emit('interim_result', {'text': evt.result.text}, room=sid))
-            speech_recognizer.recognized.connect(lambda evt: handle_final_recognition(evt, sid))
-            speech_recognizer.session_stopped.connect(lambda evt: _final_cleanup(sid, speech_recognizer))
-            speech_recognizer.canceled.connect(lambda evt: logging.info(f"Canceled event for sid {sid}."))
-            
-            speech_recognizer.start_continuous_recognition()
+            _connect_solo_recognizer(sid, speech_recognizer)
+
+            run_blocking(speech_recognizer.start_continuous_recognition)
+            deliver(socketio, 'resume_token', {'token': issue_resume_token(sid)}, sid)
         except Exception as e:
             logging.error(f"Failed to restart recognizer for sid {sid} after settings change: {e}")
-            socketio.emit('server_error', {"error": "Failed to apply new settings."})
+            deliver(socketio, 'server_error', {"error": "Failed to apply new settings."}, sid)
 
     @socketio.on('audio_data')
     def handle_audio_data(data):
         sid = request.sid
+        record_event(sid, 'audio_data', data)
         
         if sid in sid_to_room:
             room_id = sid_to_room[sid]
             if room_id in rooms and sid in rooms[room_id] and rooms[room_id][sid].get('stream'):
                 try:
                     rooms[room_id][sid]['stream'].write(data)
+                    mark_active(rooms[room_id][sid], len(data))
                 except Exception as e:
                     logging.error(f"Error writing to chat speech stream for sid {sid} in room {room_id}: {e}")
                     cleanup_chat_client_recognizer(sid, room_id)
-                    socketio.emit('server_error', {"error": "Audio stream failed. Please restart recording."}, room=sid)
+                    deliver(socketio, 'server_error', {"error": "Audio stream failed. Please restart recording."}, sid)
             else:
                 logging.warning(f"Audio data received for sid {sid} not in active chat stream.")
+        elif sid in presenter_to_broadcast:
+            broadcast_id = presenter_to_broadcast[sid]
+            broadcast = broadcasts.get(broadcast_id, {})
+            if broadcast.get('stream'):
+                try:
+                    broadcast['stream'].write(data)
+                    mark_active(broadcast, len(data))
+                except Exception as e:
+                    logging.error(f"Error writing to broadcast speech stream for {broadcast_id}: {e}")
+                    cleanup_broadcast_recognizer(broadcast_id)
+                    deliver(socketio, 'server_error', {"error": "Audio stream failed. Please restart recording."}, sid)
+            else:
+                logging.warning(f"Audio data received for broadcast {broadcast_id} with no active stream.")
         elif sid in clients and clients[sid].get('stream'):
             try:
                 clients[sid]['stream'].write(data)
+                mark_active(clients[sid], len(data))
             except Exception as e:
                 logging.error(f"Error writing to solo speech stream for sid {sid}: {e}")
                 cleanup_client(sid)
-                socketio.emit('server_error', {"error": "Audio stream failed. Please restart recording."}, room=sid)
+                deliver(socketio, 'server_error', {"error": "Audio stream failed. Please restart recording."}, sid)
+        elif buffer_orphan_audio(sid, data):
+            # A reconnected client streams audio while its resume_session is still being handled
+            logging.debug(f"Buffered audio from sid {sid} while its session is resumed.")
         else:
             logging.warning(f"Audio data received for unknown or inactive sid: {sid}")
 
     def _final_cleanup(sid, recognizer_to_clean):
         if sid in clients and clients[sid].get('recognizer') == recognizer_to_clean:
             clients.pop(sid, None)
+            drop_resume_token(sid)
             logging.info(f"Popped client {sid} because its recognizer session stopped.")
         else:
             logging.info(f"Not popping client {sid}; its recognizer may have already been replaced.")
@@ -400,34 +697,105 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
     @socketio.on('disconnect')
     def handle_disconnect():
         sid = request.sid
+        record_event(sid, 'disconnect')
         logging.info(f"Client disconnected: {sid}")
-        
+        forget_sid(sid)
+        _leave_broadcast_rooms(sid)
+
+        # A presenter is suspended like any other session, so a network blip does not end the broadcast
+        suspended_at = suspend_session(sid)
+        if suspended_at is not None:
+            hold(sid)
+            socketio.start_background_task(_expire_suspended_session, sid, suspended_at)
+            logging.info(f"Suspended session for {sid}; it can be resumed for {RECONNECT_GRACE_SECONDS:.0f}s.")
+            return
+
+        _drop_session(sid)
+
+    def _expire_suspended_session(sid, suspended_at):
+        socketio.sleep(RECONNECT_GRACE_SECONDS)
+        if suspended_sessions.get(sid) != suspended_at:
+            # Resumed, or torn down early; either way nothing more is held for the old sid
+            release(sid)
+            return
+        logging.info(f"Session for {sid} was not resumed within {RECONNECT_GRACE_SECONDS:.0f}s.")
+        _drop_session(sid)
+
+    def _drop_session(sid):
+        """Tears down a disconnected sid's solo, chat or broadcast session for good."""
+        drop_resume_token(sid)
+        release(sid)
+
+        if sid in presenter_to_broadcast:
+            _end_broadcast(presenter_to_broadcast[sid], 'The presenter disconnected.')
+
         if sid in sid_to_room:
-            room_id = sid_to_room.pop(sid)
-            if room_id in rooms and sid in rooms[room_id]:
-                user_id = rooms[room_id][sid].get('userId', 'Unknown')
-                cleanup_chat_client_recognizer(sid, room_id)
-                del rooms[room_id][sid]
-                if not rooms[room_id]:
-                    del rooms[room_id]
-                    logging.info(f"Room {room_id} is now empty and deleted.")
-                else:
-                    emit('room_update', {'users': [{'userId': member['userId']} for member in rooms[room_id].values()]}, room=room_id)
-                logging.info(f"Cleaned up disconnected chat client {user_id} (sid: {sid}).")
+            room_id = sid_to_room[sid]
+            removed_member = remove_chat_member(sid)
+            if removed_member:
+                if room_id in rooms:
+                    socketio.emit('room_update', {'users': [{'userId': member['userId']} for member in rooms[room_id].values()]}, room=room_id)
+                logging.info(f"Cleaned up disconnected chat client {removed_member.get('userId', 'Unknown')} (sid: {sid}).")
 
         elif sid in clients:
-            client_info = clients.pop(sid, None)
-            if client_info and client_info.get('recognizer'):
-                recognizer = client_info['recognizer']
-                recognizer.recognized.disconnect_all()
-                recognizer.session_stopped.disconnect_all()
-                recognizer.canceled.disconnect_all()
-                recognizer.recognizing.disconnect_all()
-                recognizer.stop_continuous_recognition()
-            if client_info and client_info.get('stream'):
-                client_info['stream'].close()
+            remove_client(sid)
             logging.info(f"Hard-cleaned and popped disconnected solo client {sid}")
 
+    @socketio.on('resume_session')
+    def handle_resume_session(data):
+        sid = request.sid
+        record_event(sid, 'resume_session', data)
+        token = data.get('token')
+        old_sid = resume_tokens.get(token)
+        if old_sid:
+            resuming_sids.add(sid)
+        try:
+            if old_sid and old_sid != sid and old_sid not in suspended_sessions and is_local_sid(socketio, old_sid):
+                # The client reconnected before this worker noticed the old socket drop; retire it so its session suspends
+                logging.info(f"Resume from {sid} takes over still-connected sid {old_sid}; disconnecting it.")
+                socketio.server.disconnect(old_sid, namespace='/')
+            old_sid = reattach_session(token, sid)
+        finally:
+            # From here on audio goes straight to the reattached stream, or is dropped if resuming failed
+            resuming_sids.discard(sid)
+        if not old_sid:
+            orphan_audio.pop(sid, None)
+            deliver(socketio, 'resume_failed', {'error': 'Session could not be resumed.'}, sid)
+            return
+
+        held = release(old_sid)
+        if sid in sid_to_room:
+            room_id = sid_to_room[sid]
+            record = rooms[room_id][sid]
+            join_room(room_id)
+            _subscribe_language_room(sid, room_id)
+            if record.get('recognizer'):
+                _connect_chat_recognizer(sid, room_id, record['userId'], record['recognizer'])
+        elif sid in clients:
+            record = clients[sid]
+            if record.get('recognizer'):
+                _connect_solo_recognizer(sid, record['recognizer'])
+        else:
+            broadcast_id = presenter_to_broadcast[sid]
+            record = broadcasts[broadcast_id]
+            if record.get('recognizer'):
+                _connect_broadcast_recognizer(sid, broadcast_id, record['recognizer'])
+        mark_active(record)
+
+        # Written before anything can yield, so it reaches the stream ahead of audio that arrives next
+        audio = orphan_audio.pop(sid, None)
+        if audio and record.get('stream'):
+            try:
+                record['stream'].write(bytes(audio))
+                mark_active(record, len(audio))
+            except Exception as e:
+                logging.error(f"Error writing buffered audio for resumed sid {sid}: {e}")
+        logging.info(f"Resumed session of {old_sid} on {sid}; replaying {len(held)} held messages.")
+
+        deliver(socketio, 'session_resumed', {'token': issue_resume_token(sid)}, sid)
+        for event, payload in held:
+            deliver(socketio, event, payload, sid)
+
     @socketio.on('process_batch')
     def handle_process_batch(data):
         sid = request.sid
@@ -436,24 +804,24 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
         source_language = data.get('sourceLanguage')
 
         if not transcript or not mode or not source_language:
-            socketio.emit('server_error', {"error": "Incomplete data received for batch processing."}, room=sid)
+            deliver(socketio, 'server_error', {"error": "Incomplete data received for batch processing."}, sid)
             return
 
         logging.info(f"Processing batch request for sid {sid}: Mode={mode}")
 
         try:
             prompt = get_batch_prompt(transcript, mode, source_language, LANGUAGE_NAMES)
-            response = model.generate_content(prompt)
+            response = run_blocking(get_batch_model(mode, source_language, LANGUAGE_NAMES).generate_content, prompt)
             report_text = response.text.strip()
             logging.info(f"Generated report for sid {sid}")
             
-            socketio.emit('batch_result', {
+            deliver(socketio, 'batch_result', {
                 "report": report_text
-            }, room=sid)
+            }, sid)
 
         except Exception as e:
             logging.error(f"Gemini API error during batch processing for sid {sid}: {e}")
-            socketio.emit('server_error', {"error": "Failed to generate report due to an API error."})
+            deliver(socketio, 'server_error', {"error": "Failed to generate report due to an API error."}, sid)
 
     @socketio.on('request_report_audio')
     def handle_request_report_audio(data):
@@ -474,11 +842,14 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
     @socketio.on('stop_translation')
     def handle_stop_translation():
         sid = request.sid
+        record_event(sid, 'stop_translation')
         logging.info(f"Client {sid} requested to stop translation.")
         
         if sid in sid_to_room:
             room_id = sid_to_room[sid]
             cleanup_chat_client_recognizer(sid, room_id)
+        elif sid in presenter_to_broadcast:
+            cleanup_broadcast_recognizer(presenter_to_broadcast[sid])
         elif sid in clients:
             cleanup_client(sid)
 
@@ -489,12 +860,12 @@ def register_handlers(socketio, model, speech_key, speech_region, speech_config,
         language = data.get('sourceLanguage')
 
         if not transcript or not language:
-            socketio.emit('server_error', {"error": "Incomplete data for AI suggestion."}, room=sid)
+            deliver(socketio, 'server_error', {"error": "Incomplete data for AI suggestion."}, sid)
             return
 
         logging.info(f"Generating AI suggestion for sid {sid}.")
-        feedback = get_interview_feedback(transcript, language)
+        feedback = get_interview_feedback(transcript, language, LANGUAGE_NAMES)
         
-        socketio.emit('ai_suggestion_result', {
+        deliver(socketio, 'ai_suggestion_result', {
             "report": feedback
-        }, room=sid)
+        }, sid)
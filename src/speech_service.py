@@ -1,5 +1,7 @@
 import logging
 import azure.cognitiveservices.speech as speechsdk
+from src.delivery import deliver
+from src.hub_safety import run_blocking
 
 def synthesize_speech(text, lang_code, sid, socketio, speech_config, LANGUAGE_VOICES, event_name='audio_synthesis_result'):
     """
@@ -16,7 +18,8 @@ def synthesize_speech(text, lang_code, sid, socketio, speech_config, LANGUAGE_VO
         speech_config.speech_synthesis_voice_name = voice_name
         speech_config.set_speech_synthesis_output_format(speechsdk.SpeechSynthesisOutputFormat.Audio16Khz128KBitRateMonoMp3)
         
-        result = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None).speak_text_async(text).get()
+        synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        result = run_blocking(lambda: synthesizer.speak_text_async(text).get())
 
         if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
             logging.info(f"Speech synthesis successful for sid {sid}.")
@@ -27,7 +30,7 @@ def synthesize_speech(text, lang_code, sid, socketio, speech_config, LANGUAGE_VO
                 return audio_data
             # For other modes, emit directly.
             else:
-                socketio.emit(event_name, {'audio': audio_data}, room=sid)
+                deliver(socketio, event_name, {'audio': audio_data}, sid)
                 return None
         else:
             cancellation = result.cancellation_details
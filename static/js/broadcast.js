@@ -0,0 +1,345 @@
+document.addEventListener("DOMContentLoaded", () => {
+    // --- DOM Elements ---
+    const broadcastIdInput = document.getElementById("broadcastId");
+    const presenterToggle = document.getElementById("presenterToggle");
+    const presenterControls = document.getElementById("presenterControls");
+    const audioSourceSelect = document.getElementById("audioSource");
+    const myLanguageSelect = document.getElementById("myLanguage");
+    const ttsToggle = document.getElementById("ttsToggle");
+    const joinButton = document.getElementById("joinButton");
+    const stopButton = document.getElementById("stopButton");
+    const statusDiv = document.getElementById("status");
+    const captionsDisplay = document.getElementById("captions");
+    const interimDisplay = document.getElementById("interimDisplay");
+
+    // --- State Variables ---
+    let socket;
+    let reconnectInterval;
+    let currentBroadcastId = null;
+    let isPresenting = false;
+    let resumeToken = null;
+    let audioContext;
+    let processor;
+    let source;
+    let mediaStream;
+    const bufferSize = 2048;
+    const targetSampleRate = 16000;
+    const audioQueue = [];
+    let isPlayingAudio = false;
+
+    function joinBroadcast() {
+        socket.emit('join_broadcast', {
+            broadcastId: currentBroadcastId,
+            language: myLanguageSelect.value,
+            ttsEnabled: ttsToggle.checked
+        });
+    }
+
+    function startBroadcast() {
+        socket.emit('start_broadcast', {
+            broadcastId: currentBroadcastId,
+            language: myLanguageSelect.value,
+            ttsEnabled: ttsToggle.checked
+        });
+    }
+
+    function connectSocket() {
+        if (socket && socket.connected) {
+            if (isPresenting) {
+                startBroadcast();
+                startAudioCapture();
+            } else {
+                joinBroadcast();
+            }
+            return;
+        }
+
+        socket = io({ reconnection: false });
+
+        socket.on('connect', () => {
+            console.log("Socket connected.");
+            if (reconnectInterval) {
+                clearInterval(reconnectInterval);
+                reconnectInterval = null;
+            }
+            if (!currentBroadcastId) return;
+            if (isPresenting) {
+                // Reattach to the broadcast the server is holding; audio sent meanwhile is buffered there
+                if (resumeToken) {
+                    socket.emit('resume_session', { token: resumeToken });
+                } else {
+                    startBroadcast();
+                }
+                if (!mediaStream) startAudioCapture();
+                return;
+            }
+            // Rejoining replays the caption backlog, so nothing said during a drop is missed
+            joinBroadcast();
+        });
+
+        // Sent once the presenter's broadcast is live; the presenter follows its own captions as a listener
+        socket.on('resume_token', (data) => {
+            resumeToken = data.token;
+            if (isPresenting) joinBroadcast();
+        });
+
+        socket.on('session_resumed', (data) => {
+            resumeToken = data.token;
+            statusDiv.textContent = "Reconnected. Keep speaking.";
+            joinBroadcast();
+        });
+
+        socket.on('resume_failed', () => {
+            resumeToken = null;
+            if (isPresenting) startBroadcast();
+        });
+
+        socket.on('interim_result', (data) => { interimDisplay.textContent = data.text; });
+
+        socket.on('broadcast_backlog', (data) => {
+            captionsDisplay.innerHTML = '';
+            data.captions.forEach(caption => showCaption(caption));
+            if (!isPresenting) statusDiv.textContent = `Listening to ${data.broadcastId}.`;
+        });
+
+        socket.on('broadcast_caption', (data) => {
+            interimDisplay.textContent = "";
+            showCaption(data);
+            if (data.audio) {
+                audioQueue.push(new Blob([data.audio], { type: 'audio/mpeg' }));
+                playNextInQueue();
+            }
+        });
+
+        socket.on('broadcast_ended', (data) => {
+            resetSession();
+            statusDiv.textContent = data.message;
+        });
+
+        socket.on('status_update', (data) => { statusDiv.textContent = data.message; });
+
+        socket.on('server_error', (data) => {
+            console.error("Server error:", data.error);
+            // A listener that could not join has nothing running; a presenter keeps the broadcast open
+            if (!isPresenting) resetSession();
+            statusDiv.textContent = `Error: ${data.error}`;
+        });
+
+        socket.on('disconnect', () => {
+            console.log("Socket disconnected.");
+            if (!currentBroadcastId) return;
+            statusDiv.textContent = "Disconnected. Attempting to reconnect...";
+            if (!reconnectInterval) {
+                reconnectInterval = setInterval(() => {
+                    if (!socket.connected) {
+                        console.log("Attempting to reconnect...");
+                        socket.connect();
+                    }
+                }, 3000);
+            }
+        });
+
+        socket.on('connect_error', (error) => {
+            console.error('Connection Error:', error);
+            statusDiv.textContent = 'Connection failed. Retrying...';
+        });
+    }
+
+    function showCaption(caption) {
+        // The backlog and live captions can overlap after a rejoin
+        const existing = captionsDisplay.querySelector(`[data-sequence="${caption.sequence}"]`);
+        if (existing) return;
+
+        const captionDiv = document.createElement('div');
+        captionDiv.dataset.sequence = caption.sequence;
+        captionDiv.classList.add('p-3', 'rounded-2xl', 'bg-surface-hover', 'shadow-md');
+
+        const translatedP = document.createElement('p');
+        translatedP.classList.add('font-medium');
+        translatedP.textContent = caption.translated;
+        captionDiv.appendChild(translatedP);
+
+        if (caption.translated !== caption.original) {
+            const originalP = document.createElement('p');
+            originalP.classList.add('text-sm', 'text-text-muted', 'mt-1');
+            originalP.textContent = caption.original;
+            captionDiv.appendChild(originalP);
+        }
+
+        // Captions can finish out of order; keep them sorted by sequence
+        const later = Array.from(captionsDisplay.children).find(child => Number(child.dataset.sequence) > caption.sequence);
+        captionsDisplay.insertBefore(captionDiv, later || null);
+        captionsDisplay.parentElement.scrollTop = captionsDisplay.parentElement.scrollHeight;
+    }
+
+    function playNextInQueue() {
+        if (isPlayingAudio || audioQueue.length === 0) return;
+        isPlayingAudio = true;
+        const audioUrl = URL.createObjectURL(audioQueue.shift());
+        const audio = new Audio(audioUrl);
+        audio.play().catch(e => {
+            console.error("Error playing TTS audio:", e);
+            isPlayingAudio = false;
+        });
+        audio.onended = () => {
+            URL.revokeObjectURL(audioUrl);
+            isPlayingAudio = false;
+            playNextInQueue();
+        };
+    }
+
+    // --- Presenter Audio ---
+    async function populateAudioInputDevices() {
+        try {
+            await navigator.mediaDevices.getUserMedia({ audio: true });
+            const devices = await navigator.mediaDevices.enumerateDevices();
+            const audioInputDevices = devices.filter(device => device.kind === 'audioinput');
+
+            audioSourceSelect.innerHTML = '';
+            if (audioInputDevices.length === 0) {
+                audioSourceSelect.innerHTML = '<option>No microphones found</option>';
+                return;
+            }
+
+            audioInputDevices.forEach(device => {
+                const option = document.createElement('option');
+                option.value = device.deviceId;
+                option.textContent = device.label || `Microphone ${audioSourceSelect.length + 1}`;
+                audioSourceSelect.appendChild(option);
+            });
+        } catch (err) {
+            console.error("Could not get audio devices:", err);
+            statusDiv.textContent = "Microphone access denied.";
+            audioSourceSelect.innerHTML = '<option>Permission denied</option>';
+        }
+    }
+
+    function startAudioCapture() {
+        const constraints = { audio: { deviceId: { exact: audioSourceSelect.value } }, video: false };
+
+        navigator.mediaDevices.getUserMedia(constraints)
+            .then(stream => {
+                mediaStream = stream;
+                audioContext = new (window.AudioContext || window.webkitAudioContext)();
+                source = audioContext.createMediaStreamSource(stream);
+                processor = audioContext.createScriptProcessor(bufferSize, 1, 1);
+
+                processor.onaudioprocess = (e) => {
+                    if (!isPresenting || !socket.connected) return;
+                    const inputData = e.inputBuffer.getChannelData(0);
+                    const downsampledBuffer = downsample(inputData, audioContext.sampleRate, targetSampleRate);
+                    socket.emit('audio_data', toPCM16(downsampledBuffer));
+                };
+
+                source.connect(processor);
+                processor.connect(audioContext.destination);
+            })
+            .catch(err => {
+                console.error("Error getting media stream:", err);
+                statusDiv.textContent = `Mic Error: ${err.message}`;
+            });
+    }
+
+    function stopAudioCapture() {
+        if (mediaStream) mediaStream.getTracks().forEach(track => track.stop());
+        if (source) source.disconnect();
+        if (processor) processor.disconnect();
+        if (audioContext) audioContext.close();
+        mediaStream = null;
+        audioContext = null;
+    }
+
+    function downsample(buffer, fromSampleRate, toSampleRate) {
+        if (fromSampleRate === toSampleRate) return buffer;
+        const sampleRateRatio = fromSampleRate / toSampleRate;
+        const newLength = Math.round(buffer.length / sampleRateRatio);
+        const result = new Float32Array(newLength);
+        let offsetResult = 0, offsetBuffer = 0;
+        while (offsetResult < result.length) {
+            const nextOffsetBuffer = Math.round((offsetResult + 1) * sampleRateRatio);
+            let accum = 0, count = 0;
+            for (let i = offsetBuffer; i < nextOffsetBuffer && i < buffer.length; i++) {
+                accum += buffer[i];
+                count++;
+            }
+            result[offsetResult] = accum / count;
+            offsetResult++;
+            offsetBuffer = nextOffsetBuffer;
+        }
+        return result;
+    }
+
+    function toPCM16(input) {
+        const buffer = new ArrayBuffer(input.length * 2);
+        const view = new DataView(buffer);
+        for (let i = 0; i < input.length; i++) {
+            const s = Math.max(-1, Math.min(1, input[i]));
+            view.setInt16(i * 2, s < 0 ? s * 0x8000 : s * 0x7FFF, true);
+        }
+        return buffer;
+    }
+
+    // --- Session Controls ---
+    function setSettingsEnabled(enabled) {
+        broadcastIdInput.disabled = !enabled;
+        presenterToggle.disabled = !enabled;
+        audioSourceSelect.disabled = !enabled;
+        joinButton.classList.toggle('hidden', !enabled);
+        stopButton.classList.toggle('hidden', enabled);
+    }
+
+    function resetSession() {
+        if (isPresenting) stopAudioCapture();
+        currentBroadcastId = null;
+        isPresenting = false;
+        resumeToken = null;
+        interimDisplay.textContent = "";
+        audioQueue.length = 0;
+        if (reconnectInterval) {
+            clearInterval(reconnectInterval);
+            reconnectInterval = null;
+        }
+        setSettingsEnabled(true);
+    }
+
+    function updateRoleLabels() {
+        presenterControls.classList.toggle('hidden', !presenterToggle.checked);
+        joinButton.textContent = presenterToggle.checked ? "Start Broadcast" : "Join Broadcast";
+        stopButton.textContent = presenterToggle.checked ? "End Broadcast" : "Leave Broadcast";
+    }
+
+    presenterToggle.addEventListener('change', () => {
+        updateRoleLabels();
+        if (presenterToggle.checked && !audioSourceSelect.options.length) populateAudioInputDevices();
+    });
+
+    joinButton.addEventListener('click', () => {
+        const broadcastId = broadcastIdInput.value.trim();
+        if (!broadcastId) {
+            statusDiv.textContent = "Please enter a Broadcast ID.";
+            return;
+        }
+        currentBroadcastId = broadcastId;
+        isPresenting = presenterToggle.checked;
+        captionsDisplay.innerHTML = '';
+        setSettingsEnabled(false);
+        statusDiv.textContent = isPresenting ? `Starting broadcast ${currentBroadcastId}...` : `Joining broadcast ${currentBroadcastId}...`;
+        connectSocket();
+    });
+
+    stopButton.addEventListener('click', () => {
+        const broadcastId = currentBroadcastId;
+        if (socket && socket.connected) socket.emit(isPresenting ? 'stop_broadcast' : 'leave_broadcast');
+        resetSession();
+        statusDiv.textContent = `Left broadcast ${broadcastId}.`;
+    });
+
+    // Listeners switch language or voice by rejoining; a presenter's language is fixed once live
+    [myLanguageSelect, ttsToggle].forEach(el => {
+        el.addEventListener('change', () => {
+            if (currentBroadcastId && socket && socket.connected) joinBroadcast();
+        });
+    });
+
+    updateRoleLabels();
+});
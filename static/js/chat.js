@@ -37,6 +37,7 @@ document.addEventListener("DOMContentLoaded", () => {
     let isPlayingAudio = false;
     let currentRoomId = null;
     let currentUserId = null;
+    let resumeToken = null;
 
     // --- Sidebar Logic ---
     sidebarToggle.addEventListener('click', () => {
@@ -101,6 +102,12 @@ document.addEventListener("DOMContentLoaded", () => {
                 clearInterval(reconnectInterval);
                 reconnectInterval = null;
             }
+            if (resumeToken) {
+                // Reattach to the session the server is holding; audio sent meanwhile is buffered there
+                socket.emit('resume_session', { token: resumeToken });
+                if (isRecording) startAudioCapture();
+                return;
+            }
             if (currentRoomId && currentUserId) {
                 socket.emit('join_room', { roomId: currentRoomId, userId: currentUserId, language: myLanguageSelect.value });
             }
@@ -110,6 +117,21 @@ document.addEventListener("DOMContentLoaded", () => {
             }
         });
 
+        socket.on('resume_token', (data) => { resumeToken = data.token; });
+
+        socket.on('session_resumed', (data) => {
+            resumeToken = data.token;
+            statusDiv.textContent = isRecording ? "Reconnected. Start to speak." : "Reconnected.";
+        });
+
+        socket.on('resume_failed', () => {
+            resumeToken = null;
+            if (currentRoomId && currentUserId) {
+                socket.emit('join_room', { roomId: currentRoomId, userId: currentUserId, language: myLanguageSelect.value });
+            }
+            if (isRecording) emitChatSettings();
+        });
+
         socket.on('interim_result', (data) => { interimDisplay.textContent = data.text; });
 
         socket.on('chat_message', (data) => {
@@ -249,13 +271,20 @@ document.addEventListener("DOMContentLoaded", () => {
 
     function startAudioCaptureAndEmitSettings() {
         statusDiv.textContent = "Microphone connected. Connecting to server...";
+        emitChatSettings();
+        startAudioCapture();
+    }
+
+    function emitChatSettings() {
         socket.emit('start_chat_translation', {
             language: myLanguageSelect.value,
             ttsEnabled: ttsToggle.checked,
             roomId: currentRoomId,
             userId: currentUserId
         });
+    }
 
+    function startAudioCapture() {
         const constraints = { audio: { deviceId: { exact: audioSourceSelect.value } }, video: false };
 
         navigator.mediaDevices.getUserMedia(constraints)
@@ -15,6 +15,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
     // --- State Variables ---
     let isRecording = false;
+    let resumeToken = null;
     let inactivityTimer = null;
     let lastAudioTime = 0;
     const INACTIVITY_TIMEOUT_SECONDS = 60;
@@ -91,9 +92,27 @@ document.addEventListener("DOMContentLoaded", () => {
                 clearInterval(reconnectInterval);
                 reconnectInterval = null;
             }
+            if (resumeToken) {
+                // Reattach to the session the server is holding; audio sent meanwhile is buffered there
+                socket.emit('resume_session', { token: resumeToken });
+                if (isRecording) startAudioProcessing();
+                return;
+            }
             sendSettings(); // Send initial settings on connect
         });
 
+        socket.on('resume_token', (data) => { resumeToken = data.token; });
+
+        socket.on('session_resumed', (data) => {
+            resumeToken = data.token;
+            statusDiv.textContent = "Reconnected to server.";
+        });
+
+        socket.on('resume_failed', () => {
+            resumeToken = null;
+            sendSettings();
+        });
+
         socket.on('interim_result', (data) => {
             if (!conversationDisplay) return;
             let interimContainer = document.getElementById('interim-container');
@@ -1,46 +1,37 @@
 
-import os
-import google.generativeai as genai
 import logging
-
-# Configure the Gemini model
-try:
-    model = genai.GenerativeModel(model_name="gemini-2.5-flash-lite")
-except Exception as e:
-    logging.error(f"Failed to initialize Gemini model in summary.py: {e}")
-    model = None
-
-def get_summary_from_text(transcript_text: str, language: str) -> str:
+from src.hub_safety import run_blocking
+from src.translation_service import get_model, language_label
+
+def get_summary_instruction(language: str, LANGUAGE_NAMES: dict) -> str:
+    """Returns the system instruction for summarizing a transcript in the given language."""
+    # Only supported languages reach the instruction, which keys the cached model
+    language = language_label(language, LANGUAGE_NAMES) or "the transcript's language"
+    return (
+        "You are a professional assistant summarizing a discussion. "
+        f"The user sends a conversation transcript in {language}. "
+        f"Provide a concise, easy-to-read summary of the key points, decisions, and action items, written in {language}."
+    )
+
+def get_summary_from_text(transcript_text: str, language: str, LANGUAGE_NAMES: dict) -> str:
     """
     Generates a summary for the given transcript text using the Gemini API.
 
     Args:
         transcript_text: The full text of the conversation to be summarized.
-        language: The language of the transcript to inform the model.
+        language: The language code or name of the transcript to inform the model.
+        LANGUAGE_NAMES: The supported language codes and their names.
 
     Returns:
         A string containing the summary, or an error message.
     """
-    if not model:
-        return "Error: Summary model is not configured."
     if not transcript_text or not transcript_text.strip():
         return "Nothing to summarize."
 
     try:
-        # Construct a clear and effective prompt
-        prompt = (
-            f"You are a professional assistant tasked with summarizing a discussion. "
-            f"The following text is a transcript of a conversation in {language}. "
-            f"Please provide a concise, easy-to-read summary of the key points, decisions, and action items. "
-            f"The summary should be in {language}.\n\n"
-            f"Transcript:\n"
-            f"==========\n"
-            f"{transcript_text}\n"
-            f"==========\n\n"
-            f"Summary:"
-        )
-
-        response = model.generate_content(prompt)
+        # The instructions are cached on the model; only the transcript is sent per request
+        model = get_model(get_summary_instruction(language, LANGUAGE_NAMES))
+        response = run_blocking(model.generate_content, transcript_text)
         summary = response.text.strip()
         logging.info("Successfully generated summary from transcript.")
         return summary
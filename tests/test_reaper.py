@@ -0,0 +1,55 @@
+import time
+import types
+
+import pytest
+
+from src import client_manager
+from src.reaper import reap_once
+
+
+class FakeSocketIO:
+    def __init__(self, connected):
+        self.connected = set(connected)
+        self.emits = []
+        self.server = types.SimpleNamespace(
+            manager=types.SimpleNamespace(is_connected=lambda sid, namespace: sid in self.connected),
+            leave_room=lambda sid, room, namespace=None: None,
+        )
+
+    def emit(self, event, payload=None, room=None, **kwargs):
+        self.emits.append((event, payload, room))
+
+
+@pytest.fixture(autouse=True)
+def empty_state():
+    for state in (client_manager.clients, client_manager.rooms, client_manager.sid_to_room, client_manager.broadcasts):
+        state.clear()
+    yield
+    for state in (client_manager.clients, client_manager.rooms, client_manager.sid_to_room, client_manager.broadcasts):
+        state.clear()
+
+
+def test_reaping_a_chat_member_sends_room_update():
+    now = time.monotonic()
+    client_manager.rooms['room-1'] = {
+        'sid-a': {'userId': 'alice', 'last_active': now},
+        'sid-b': {'userId': 'bob', 'last_active': now},
+    }
+    client_manager.sid_to_room.update({'sid-a': 'room-1', 'sid-b': 'room-1'})
+    socketio = FakeSocketIO(connected=['sid-a'])
+
+    reap_once(socketio)
+
+    assert list(client_manager.rooms['room-1']) == ['sid-a']
+    assert ('room_update', {'users': [{'userId': 'alice'}]}, 'room-1') in socketio.emits
+
+
+def test_no_room_update_when_nobody_is_reaped():
+    now = time.monotonic()
+    client_manager.rooms['room-1'] = {'sid-a': {'userId': 'alice', 'last_active': now}}
+    client_manager.sid_to_room['sid-a'] = 'room-1'
+    socketio = FakeSocketIO(connected=['sid-a'])
+
+    reap_once(socketio)
+
+    assert not [emit for emit in socketio.emits if emit[0] == 'room_update']